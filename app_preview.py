@@ -115,12 +115,14 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Load data
-@st.cache_data
-def load_cached_data():
-    return load_data()
+# Load data (reloads when the input files change, appending new rows incrementally).
+# One shared, read-only copy per process, memory-mapped from the on-disk cache
+@st.cache_resource(max_entries=1)
+def load_cached_data(input_signature):
+    df, aggregates = load_dataset()
+    return df, aggregates, build_partition_index(df)
 
-df = load_cached_data()
+df, aggregates, partitions = load_cached_data(get_input_signature())
 
 # Helper function for formatting
 def format_amount(value):
@@ -131,7 +133,7 @@ def format_amount(value):
         return f"${value/1e3:.0f}K"
 
 # Get YoY data
-yoy = calculate_yoy_comparison(df)
+yoy = calculate_yoy_comparison(df, cube=aggregates['sales_cube'])
 
 # Scorecard component (reusable)
 def create_scorecard(channels_metrics):
@@ -187,11 +189,7 @@ for channel_name, channel_key, color in [
     ('EMD', 'EMD', '#ffb74d'),
     ('OBD', 'OBD', '#e57373')
 ]:
-    ch_data = df[df['year'] == 2025]
-    if channel_key == 'DI':
-        ch_data = ch_data[ch_data['Type'] == 'DI']
-    else:
-        ch_data = ch_data[ch_data['Type'] == channel_key]
+    ch_data = get_partition(df, partitions, 2025, channel_key)
     
     total_rev = ch_data['revenue_clean'].sum()
     total_qty = ch_data['qty_clean'].sum()
@@ -239,84 +237,71 @@ with tab1:
     with col1:
         st.subheader("2025년 월별 매출 추이")
         
-        # Check if date column exists
-        if 'date' in df.columns or 'Date' in df.columns:
-            date_col = 'date' if 'date' in df.columns else 'Date'
-            df_2025 = df[df['year'] == 2025].copy()
-            df_2025[date_col] = pd.to_datetime(df_2025[date_col], errors='coerce')
-            df_2025['month'] = df_2025[date_col].dt.to_period('M').astype(str)
+        # Monthly totals come from the aggregate cached with the data
+        monthly_trend = aggregates['monthly_trend']
+        
+        monthly_data = []
+        for channel_name, channel_key, color in [
+            ('MMD', 'MMD', '#4fc3f7'),
+            ('FOB', 'DI', '#81c784'),
+            ('EMD', 'EMD', '#ffb74d'),
+            ('OBD', 'OBD', '#e57373')
+        ]:
+            month_revenue = get_monthly_trend(monthly_trend, 2025, channel_key)
+            month_revenue['channel'] = channel_name
+            month_revenue['color'] = color
+            monthly_data.append(month_revenue)
+        
+        if monthly_data:
+            all_months = pd.concat(monthly_data, ignore_index=True)
             
-            # Group by month and channel
-            monthly_data = []
-            for channel_name, channel_key, color in [
-                ('MMD', 'MMD', '#4fc3f7'),
-                ('FOB', 'DI', '#81c784'),
-                ('EMD', 'EMD', '#ffb74d'),
-                ('OBD', 'OBD', '#e57373')
-            ]:
-                ch_data = df_2025.copy()
-                if channel_key == 'DI':
-                    ch_data = ch_data[ch_data['Type'] == 'DI']
-                else:
-                    ch_data = ch_data[ch_data['Type'] == channel_key]
-                
-                month_revenue = ch_data.groupby('month')['revenue_clean'].sum().reset_index()
-                month_revenue['channel'] = channel_name
-                month_revenue['color'] = color
-                monthly_data.append(month_revenue)
+            # Create line chart
+            fig = go.Figure()
             
-            if monthly_data:
-                all_months = pd.concat(monthly_data, ignore_index=True)
-                
-                # Create line chart
-                fig = go.Figure()
-                
-                for channel_name, color in [('MMD', '#4fc3f7'), ('FOB', '#81c784'), 
-                                            ('EMD', '#ffb74d'), ('OBD', '#e57373')]:
-                    ch_month = all_months[all_months['channel'] == channel_name]
-                    fig.add_trace(go.Scatter(
-                        x=ch_month['month'],
-                        y=ch_month['revenue_clean'],
-                        mode='lines+markers',
-                        name=channel_name,
-                        line=dict(color=color, width=3),
-                        marker=dict(size=8, color=color, line=dict(width=2, color='white')),
-                        text=ch_month['revenue_clean'].apply(lambda x: format_amount(x)),
-                        hovertemplate='%{fullData.name}<br>%{x}<br>%{text}<extra></extra>'
-                    ))
-                
-                fig.update_layout(
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    font=dict(color='white', size=14),
-                    xaxis=dict(
-                        title='Month',
-                        tickfont=dict(size=14),
-                        gridcolor='rgba(255,255,255,0.1)'
-                    ),
-                    yaxis=dict(
-                        title='Revenue',
-                        tickfont=dict(size=14),
-                        gridcolor='rgba(255,255,255,0.1)'
-                    ),
-                    legend=dict(
-                        orientation='h',
-                        yanchor='bottom',
-                        y=1.02,
-                        xanchor='center',
-                        x=0.5,
-                        bgcolor='rgba(255,255,255,0.05)',
-                        font=dict(size=12)
-                    ),
-                    height=400,
-                    margin=dict(l=60, r=20, t=60, b=60)
-                )
-                
-                st.plotly_chart(fig, width='stretch', config={'staticPlot': True})
-            else:
-                st.info("월별 데이터 없음")
+            for channel_name, color in [('MMD', '#4fc3f7'), ('FOB', '#81c784'), 
+                                        ('EMD', '#ffb74d'), ('OBD', '#e57373')]:
+                ch_month = all_months[all_months['channel'] == channel_name]
+                fig.add_trace(go.Scatter(
+                    x=ch_month['label'],
+                    y=ch_month['revenue_clean'],
+                    mode='lines+markers',
+                    name=channel_name,
+                    line=dict(color=color, width=3),
+                    marker=dict(size=8, color=color, line=dict(width=2, color='white')),
+                    text=ch_month['revenue_clean'].apply(lambda x: format_amount(x)),
+                    hovertemplate='%{fullData.name}<br>%{x}<br>%{text}<extra></extra>'
+                ))
+            
+            fig.update_layout(
+                plot_bgcolor='rgba(0,0,0,0)',
+                paper_bgcolor='rgba(0,0,0,0)',
+                font=dict(color='white', size=14),
+                xaxis=dict(
+                    title='Month',
+                    tickfont=dict(size=14),
+                    gridcolor='rgba(255,255,255,0.1)'
+                ),
+                yaxis=dict(
+                    title='Revenue',
+                    tickfont=dict(size=14),
+                    gridcolor='rgba(255,255,255,0.1)'
+                ),
+                legend=dict(
+                    orientation='h',
+                    yanchor='bottom',
+                    y=1.02,
+                    xanchor='center',
+                    x=0.5,
+                    bgcolor='rgba(255,255,255,0.05)',
+                    font=dict(size=12)
+                ),
+                height=400,
+                margin=dict(l=60, r=20, t=60, b=60)
+            )
+            
+            st.plotly_chart(fig, width='stretch', config={'staticPlot': True})
         else:
-            st.info("데이터에 날짜 컬럼이 없어 월별 트렌드를 표시할 수 없습니다.")
+            st.info("월별 데이터 없음")
     
     with col2:
         st.subheader("채널 성과 스코어카드")
@@ -334,13 +319,9 @@ with tab2:
         matrix_data = []
         for channel_name, channel_key in [('MMD', 'MMD'), ('FOB', 'DI'), 
                                           ('EMD', 'EMD'), ('OBD', 'OBD')]:
-            ch_data = df[df['year'] == 2025]
-            if channel_key == 'DI':
-                ch_data = ch_data[ch_data['Type'] == 'DI']
-            else:
-                ch_data = ch_data[ch_data['Type'] == channel_key]
+            ch_data = get_partition(df, partitions, 2025, channel_key)
             
-            cat_rev = ch_data.groupby('category')['revenue_clean'].sum().to_dict()
+            cat_rev = ch_data.groupby('category', observed=True)['revenue_clean'].sum().to_dict()
             row = {'Channel': channel_name}
             row.update(cat_rev)
             matrix_data.append(row)
@@ -395,23 +376,19 @@ with tab3:
         # Create compact product list
         products_html = "<div style='display: flex; flex-direction: column; gap: 15px;'>"
         
+        best_sellers = get_top_n_by_channel(
+            select_year(df, 2025, partitions), 'item_display', 3,
+            channels=['MMD', 'DI', 'EMD', 'OBD']
+        )
+        
         for channel_name, channel_key, color in [
             ('MMD', 'MMD', '#4fc3f7'),
             ('FOB', 'DI', '#81c784'),
             ('EMD', 'EMD', '#ffb74d'),
             ('OBD', 'OBD', '#e57373')
         ]:
-            ch_data = df[df['year'] == 2025]
-            if channel_key == 'DI':
-                ch_data = ch_data[ch_data['Type'] == 'DI']
-            else:
-                ch_data = ch_data[ch_data['Type'] == channel_key]
-            
             # Get top 3 products
-            top_products = ch_data.groupby('item_display').agg({
-                'revenue_clean': 'sum',
-                'qty_clean': 'sum'
-            }).reset_index().sort_values('revenue_clean', ascending=False).head(3)
+            top_products = best_sellers[channel_key]
             
             products_html += f"""
             <div style='background: linear-gradient(135deg, {color}15, {color}08);
@@ -0,0 +1,214 @@
+"""Benchmark data_loader functions on synthetic sales data.
+
+Generates sales_total.csv files with the same columns as the real export,
+using the customers in data/db_buyer.csv and the SKUs in
+data/item_master.csv, then reports wall time, peak traced memory and
+peak process RSS growth for each function and writes the results as JSON.
+tracemalloc only sees allocations made through Python's allocator, so
+Arrow buffers and memory-mapped cache pages show up in the RSS figure
+alone. RSS in turn does not grow when freed memory is reused, so size
+hardware from the larger of the two.
+
+Usage:
+    python benchmarks/bench_data_loader.py --rows 100000 1000000 10000000
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import data_loader
+from stage_timing import current_rss
+
+DEFAULT_ROWS = [100_000, 1_000_000, 10_000_000]
+
+# Rows generated and written per batch, so 10M-row files fit in memory
+GENERATE_BATCH_ROWS = 1_000_000
+
+# Interval between RSS samples while measuring process memory
+RSS_SAMPLE_SECONDS = 0.001
+
+# Non-product SKUs that load_data is expected to drop
+JUNK_SKUS = ['Discount', 'Other Income', 'Freight', 'Shipping']
+
+def format_money(values):
+    """Format floats the way the accounting export does: $1,234.56"""
+    return pd.Series(values).map('${:,.2f}'.format)
+
+def generate_sales(path, rows, data_dir, seed=0):
+    """Write a synthetic sales_total.csv with ``rows`` transactions"""
+    rng = np.random.default_rng(seed)
+    buyers = pd.read_csv(os.path.join(data_dir, 'db_buyer.csv'))
+    items = pd.read_csv(os.path.join(data_dir, 'item_master.csv'), skiprows=[0], dtype={'SKU': str})
+    
+    customers = np.array(list(buyers['Customer']) + ['Walk-in Customer'], dtype=object)
+    item_columns = {
+        'item': 'ProductName_Short',
+        'category': 'Category',
+        'brand': 'Brand',
+        'shape': 'Shape',
+        'size_capacity': 'Size_Capacity',
+    }
+    start = np.datetime64('2024-01-01')
+    
+    written = 0
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        while written < rows:
+            n = min(GENERATE_BATCH_ROWS, rows - written)
+            
+            picks = rng.integers(0, len(items), n)
+            batch = pd.DataFrame({
+                'date': pd.to_datetime(start + rng.integers(0, 730, n)).strftime('%m/%d/%Y'),
+                'customer': customers[rng.integers(0, len(customers), n)],
+                'sku': items['SKU'].to_numpy()[picks],
+            })
+            for column, source in item_columns.items():
+                batch[column] = items[source].to_numpy()[picks]
+            
+            # About 1% of rows are non-product lines
+            junk = rng.random(n) < 0.01
+            batch.loc[junk, 'sku'] = rng.choice(JUNK_SKUS, junk.sum())
+            
+            qty = rng.integers(1, 2_000, n)
+            price = rng.integers(100, 5_000, n) / 100
+            batch['qty'] = pd.Series(qty).map('{:,}'.format)
+            batch['price'] = format_money(price)
+            batch['revenue'] = format_money(qty * price)
+            
+            batch.to_csv(f, header=written == 0, index=False)
+            written += n
+
+def measure_peak_rss(func):
+    """Peak growth of process RSS over one run of ``func``, sampled from a thread; None without /proc"""
+    gc.collect()
+    baseline = current_rss()
+    if baseline is None:
+        return None
+    
+    peak = [baseline]
+    done = threading.Event()
+    
+    def sample():
+        while not done.wait(RSS_SAMPLE_SECONDS):
+            peak[0] = max(peak[0], current_rss() or 0)
+    
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    try:
+        func()
+    finally:
+        done.set()
+        sampler.join()
+    peak[0] = max(peak[0], current_rss() or 0)
+    
+    return peak[0] - baseline
+
+def measure(func, repeat):
+    """Best wall time over ``repeat`` runs, then peak traced memory and peak RSS growth of one more run each"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    return result, min(timings), peak, measure_peak_rss(func)
+
+# (name, func(df, data_dir)) pairs; df is the frame already loaded from data_dir
+BENCHMARKS = [
+    ('load_data', lambda df, data_dir: data_loader.load_data(data_dir, use_cache=False)),
+    ('load_all_inputs', lambda df, data_dir: data_loader.load_all_inputs(data_dir, use_cache=False)),
+    ('load_data_cached', lambda df, data_dir: data_loader.load_data(data_dir, os.path.join(data_dir, '.cache'))),
+    ('calculate_kpis', lambda df, data_dir: data_loader.calculate_kpis(df, 2025)),
+    ('calculate_yoy_comparison', lambda df, data_dir: data_loader.calculate_yoy_comparison(df)),
+    ('get_top_buyers_by_channel', lambda df, data_dir: data_loader.get_top_buyers_by_channel(df, 2025, 5)),
+    ('get_category_yoy_growth', lambda df, data_dir: data_loader.get_category_yoy_growth(df)),
+    ('get_channel_category_breakdown', lambda df, data_dir: data_loader.get_channel_category_breakdown(df, 2025)),
+    ('get_margin_breakdown', lambda df, data_dir: data_loader.get_margin_breakdown(df, data_loader.build_sku_dimension(data_dir), ['Type'], 2025)),
+]
+
+def get_git_commit():
+    """Current commit hash, or None outside a git checkout"""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=REPO_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(rows_list, repeat, source_dir):
+    """Run every benchmark at every scale and return the result records"""
+    results = []
+    
+    for rows in rows_list:
+        work_dir = tempfile.mkdtemp(prefix='sa-bench-')
+        try:
+            for name in data_loader.ALL_INPUTS[1:]:
+                shutil.copy(os.path.join(source_dir, name), work_dir)
+            
+            start = time.perf_counter()
+            generate_sales(os.path.join(work_dir, 'sales_total.csv'), rows, source_dir)
+            print(f'[{rows:,} rows] generated in {time.perf_counter() - start:.1f}s', file=sys.stderr)
+            
+            # Build once so cached loads and aggregations see the final frame
+            df = data_loader.load_data(work_dir, os.path.join(work_dir, '.cache'))
+            
+            for name, func in BENCHMARKS:
+                _, seconds, peak, peak_rss = measure(lambda: func(df, work_dir), repeat)
+                peak_rss_mb = None if peak_rss is None else round(peak_rss / 1e6, 3)
+                results.append({
+                    'function': name,
+                    'rows': rows,
+                    'rows_loaded': len(df),
+                    'seconds': round(seconds, 6),
+                    'peak_mb': round(peak / 1e6, 3),
+                    'peak_rss_mb': peak_rss_mb,
+                })
+                rss_text = 'n/a' if peak_rss is None else f'{peak_rss / 1e6:.1f} MB'
+                print(f'[{rows:,} rows] {name:<32} {seconds:9.4f}s {peak / 1e6:10.1f} MB traced {rss_text:>10} RSS', file=sys.stderr)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_ROWS, help='synthetic row counts to benchmark')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per function (best is reported)')
+    parser.add_argument('--data-dir', default=os.path.join(REPO_DIR, data_loader.DATA_DIR), help='directory with the non-sales inputs (db_buyer.csv, item_master.csv, tjx_item.csv, poe.csv)')
+    parser.add_argument('--output', default='bench_results.json', help='where to write the JSON results')
+    args = parser.parse_args()
+    
+    report = {
+        'commit': get_git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'results': run(args.rows, args.repeat, args.data_dir),
+    }
+    
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f'Results written to {args.output}', file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
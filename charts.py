@@ -0,0 +1,276 @@
+import plotly.graph_objects as go
+
+from stage_timing import timed
+
+CHANNEL_COLORS = ['#4fc3f7', '#81c784', '#ffb74d', '#e57373']
+
+def format_amount(value):
+    """Format amount as M or K"""
+    if value >= 1_000_000:
+        return f"${value/1e6:.1f}M"
+    else:
+        return f"${value/1e3:.0f}K"
+
+@timed()
+def build_channel_mix_donut(kpis):
+    """Channel revenue distribution donut from the KPI dict"""
+    fig = go.Figure(data=[go.Pie(
+        labels=['MMD', 'FOB', 'EMD', 'OBD'],
+        values=[kpis['mmd_sales'], kpis['fob_sales'], kpis['emd_sales'], kpis['obd_sales']],
+        hole=0.4,
+        marker=dict(
+            colors=CHANNEL_COLORS,
+            line=dict(color='white', width=2)
+        ),
+        textinfo='label+percent',
+        textfont=dict(size=16, color='white', family='Arial Black'),
+        hovertemplate='<b>%{label}</b><br>%{value:,.0f}<br>%{percent}<extra></extra>'
+    )])
+
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white', size=14),
+        showlegend=True,
+        legend=dict(
+            orientation='h',
+            yanchor='bottom',
+            y=-0.1,
+            xanchor='center',
+            x=0.5,
+            bgcolor='rgba(255,255,255,0.05)',
+            font=dict(size=14)
+        ),
+        height=400,
+        margin=dict(l=20, r=20, t=40, b=60)
+    )
+
+    return fig
+
+@timed()
+def build_channel_growth_bar(yoy):
+    """Channel YoY growth bars from the YoY comparison dict"""
+    growth = [yoy['mmd']['growth'], yoy['fob']['growth'], yoy['emd']['growth'], yoy['obd']['growth']]
+
+    fig = go.Figure(data=[go.Bar(
+        x=['MMD', 'FOB', 'EMD', 'OBD'],
+        y=growth,
+        marker=dict(
+            color=CHANNEL_COLORS,
+            line=dict(color='white', width=2)
+        ),
+        text=[f'<b>{val:+.1f}%</b>' for val in growth],
+        textposition='auto',
+        textfont=dict(size=18, color='white'),
+        hovertemplate='<b>%{x}</b><br>%{y:+.1f}%<extra></extra>'
+    )])
+
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white', size=14),
+        xaxis=dict(
+            title='',
+            tickfont=dict(size=16, color='white')
+        ),
+        yaxis=dict(
+            title='성장률 (%)',
+            gridcolor='rgba(255,255,255,0.1)',
+            tickfont=dict(size=14, color='white'),
+            zeroline=True,
+            zerolinecolor='rgba(255,255,255,0.3)',
+            zerolinewidth=2
+        ),
+        height=400,
+        margin=dict(l=60, r=20, t=60, b=40)
+    )
+
+    return fig
+
+@timed()
+def build_top_buyers_bar(buyers):
+    """Horizontal top-buyer revenue bars; ``buyers`` is in display (ascending) order"""
+    display_name = buyers['Name'].fillna(buyers['customer'])
+
+    fig = go.Figure(go.Bar(
+        y=display_name,
+        x=buyers['revenue_clean'],
+        orientation='h',
+        marker=dict(color='#4fc3f7', line=dict(color='white', width=1.5)),
+        text=buyers['revenue_clean'].apply(lambda x: f'<b>{format_amount(x)}</b>'),
+        textposition='auto',
+        textfont=dict(size=16, color='white')
+    ))
+    fig.update_layout(
+        height=350,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white', size=14),
+        xaxis=dict(title="매출액", gridcolor='rgba(255,255,255,0.1)', tickfont=dict(size=16)),
+        yaxis=dict(tickfont=dict(size=16)),
+        margin=dict(l=150,r=10,t=10,b=40)
+    )
+
+    return fig
+
+@timed()
+def build_top_products_bar(products):
+    """Horizontal top-product quantity bars; ``products`` is in display (ascending) order"""
+    fig = go.Figure(go.Bar(
+        y=products['item_display'],
+        x=products['qty_clean'],
+        orientation='h',
+        marker=dict(color='#81c784', line=dict(color='white', width=1.5)),
+        text=products['qty_clean'].apply(lambda x: f'<b>{int(x):,}</b>'),
+        textposition='auto',
+        textfont=dict(size=16, color='white')
+    ))
+    fig.update_layout(
+        height=350,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white', size=14),
+        xaxis=dict(title="판매 수량", gridcolor='rgba(255,255,255,0.1)', tickfont=dict(size=16)),
+        yaxis=dict(tickfont=dict(size=16)),
+        margin=dict(l=150,r=10,t=10,b=40)
+    )
+
+    return fig
+
+@timed()
+def build_tjx_buyer_comparison(comparison):
+    """Grouped 2024/2025 TJX buyer revenue bars from get_tjx_buyer_comparison output"""
+    fig = go.Figure()
+
+    # Sort for display
+    tjx_display = comparison.sort_values('revenue_2025', ascending=True)
+
+    # Add 2024 bars
+    fig.add_trace(go.Bar(
+        y=tjx_display['display_name'],
+        x=tjx_display['revenue_2024'],
+        name='2024',
+        orientation='h',
+        marker=dict(color='#90caf9', line=dict(color='white', width=1)),
+        text=tjx_display['revenue_2024'].apply(lambda x: f'{format_amount(x)}'),
+        textposition='auto',
+        textfont=dict(size=14, color='white')
+    ))
+
+    # Add 2025 bars
+    fig.add_trace(go.Bar(
+        y=tjx_display['display_name'],
+        x=tjx_display['revenue_2025'],
+        name='2025',
+        orientation='h',
+        marker=dict(color='#4fc3f7', line=dict(color='white', width=1)),
+        text=tjx_display['revenue_2025'].apply(lambda x: f'{format_amount(x)}'),
+        textposition='auto',
+        textfont=dict(size=14, color='white')
+    ))
+
+    fig.update_layout(
+        barmode='group',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white', size=14),
+        xaxis=dict(title="매출액", gridcolor='rgba(255,255,255,0.1)', tickfont=dict(size=14)),
+        yaxis=dict(tickfont=dict(size=14)),
+        legend=dict(
+            orientation='h',
+            yanchor='bottom',
+            y=1.02,
+            xanchor='right',
+            x=1,
+            bgcolor='rgba(255,255,255,0.05)',
+            font=dict(size=12)
+        ),
+        height=400,
+        margin=dict(l=150, r=20, t=50, b=40)
+    )
+
+    return fig
+
+@timed()
+def build_brand_size_bars(brand_sizes):
+    """Grouped size bars for the top brands of a set category (brand_sizes TJX aggregate)"""
+    product_analysis = brand_sizes.sort_values('qty_clean', ascending=False).head(10)
+
+    # Create stacked bar chart by brand
+    brands = product_analysis['brand'].unique()
+
+    fig = go.Figure()
+
+    for brand in brands[:5]:  # Top 5 brands
+        brand_data = product_analysis[product_analysis['brand'] == brand]
+        brand_data = brand_data.sort_values('qty_clean', ascending=False)
+
+        fig.add_trace(go.Bar(
+            name=str(brand),
+            x=brand_data['size_capacity'].astype(str),
+            y=brand_data['qty_clean'],
+            text=brand_data['qty_clean'].apply(lambda x: f'{int(x):,}'),
+            textposition='auto',
+            textfont=dict(size=12, color='white')
+        ))
+
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white', size=12),
+        xaxis=dict(title="사이즈", tickfont=dict(size=12)),
+        yaxis=dict(title="판매 수량", gridcolor='rgba(255,255,255,0.1)', tickfont=dict(size=12)),
+        legend=dict(
+            orientation='h',
+            yanchor='bottom',
+            y=1.02,
+            xanchor='center',
+            x=0.5,
+            bgcolor='rgba(255,255,255,0.05)',
+            font=dict(size=10)
+        ),
+        height=300,
+        margin=dict(l=60, r=20, t=50, b=40),
+        barmode='group'
+    )
+
+    return fig
+
+@timed()
+def build_brand_bar(brands):
+    """Horizontal top-8 brand quantity bars for a category (brands TJX aggregate)"""
+    brand_analysis = brands.sort_values('qty_clean', ascending=False).head(8)
+    brand_analysis = brand_analysis.sort_values('qty_clean', ascending=True)  # For horizontal display
+
+    fig = go.Figure(go.Bar(
+        y=brand_analysis['brand'].astype(str),
+        x=brand_analysis['qty_clean'],
+        orientation='h',
+        marker=dict(color='#ffb74d', line=dict(color='white', width=1)),
+        text=brand_analysis['qty_clean'].apply(lambda x: f'{int(x):,}'),
+        textposition='auto',
+        textfont=dict(size=12, color='white')
+    ))
+
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white', size=12),
+        xaxis=dict(title="판매 수량", gridcolor='rgba(255,255,255,0.1)', tickfont=dict(size=12)),
+        yaxis=dict(tickfont=dict(size=12)),
+        height=300,
+        margin=dict(l=100, r=20, t=10, b=40)
+    )
+
+    return fig
+
+# Figure builders by chart name; each takes one data argument and returns a go.Figure
+FIGURE_BUILDERS = {
+    'channel_mix': build_channel_mix_donut,
+    'channel_growth': build_channel_growth_bar,
+    'top_buyers': build_top_buyers_bar,
+    'top_products': build_top_products_bar,
+    'tjx_buyers': build_tjx_buyer_comparison,
+    'brand_sizes': build_brand_size_bars,
+    'brands': build_brand_bar,
+}
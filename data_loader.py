@@ -1,119 +1,1005 @@
+import csv
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import pandas as pd
 from datetime import datetime
 
-def load_data():
-    """Load and merge sales_total.csv with db_buyer.csv"""
-    # Load sales data
-    sales = pd.read_csv('data/sales_total.csv')
-    
-    # Clean revenue column - remove $ and commas
-    sales['revenue_clean'] = pd.to_numeric(
-        sales['revenue'].astype(str).str.replace('$','', regex=False).str.replace(',','', regex=False),
-        errors='coerce'
-    ).fillna(0)
-    
-    # Clean qty column - remove commas
-    sales['qty_clean'] = pd.to_numeric(
-        sales['qty'].astype(str).str.replace(',','', regex=False),
-        errors='coerce'
-    ).fillna(0).astype(int)
-    
-    # Clean price column - remove $ and commas
-    sales['price_clean'] = pd.to_numeric(
-        sales['price'].astype(str).str.replace('$','', regex=False).str.replace(',','', regex=False),
-        errors='coerce'
-    ).fillna(0)
-    
-    # Convert date
-    sales['date'] = pd.to_datetime(sales['date'])
-    sales['year'] = sales['date'].dt.year
-    sales['month'] = sales['date'].dt.month
-    sales['quarter'] = sales['date'].dt.quarter
-    
-    # Load buyer data
-    buyers = pd.read_csv('data/db_buyer.csv')
+from stage_timing import bind_timing, timed, timed_iter, timed_stage
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # Disk cache is skipped without pyarrow
+    feather = None
+
+try:
+    import duckdb
+except ImportError:  # The duckdb query backend falls back to pandas without it
+    duckdb = None
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = 'data'
+CACHE_DIR = os.path.join(DATA_DIR, '.cache')
+
+# Rows per chunk when streaming sales_total.csv; None (SA_SALES_CHUNK_ROWS=0)
+# reads it in one go, trading bounded memory for the CSV_ENGINE parser
+SALES_CHUNK_ROWS = int(os.environ.get('SA_SALES_CHUNK_ROWS', 200_000)) or None
+
+# CSV parser for whole-file reads: 'c', or 'pyarrow' for multithreaded parsing.
+# Chunked reads always use the C parser, which is the only one that streams,
+# so sales_total.csv only uses it when SALES_CHUNK_ROWS is None.
+CSV_ENGINE = os.environ.get('SA_CSV_ENGINE', 'c')
+
+# Engine behind aggregate_frame: 'pandas', or 'duckdb' for multithreaded SQL
+QUERY_BACKEND = os.environ.get('SA_QUERY_BACKEND', 'pandas')
+
+# Every CSV input under DATA_DIR: the columns we use, their dtypes and any
+# dates to parse with their fixed format, so readers project, type and
+# parse columns at read time. Raw sales numbers stay text because
+# parse_accounting cleans them. poe.csv is a nested report that parse_poe
+# reads line by line, so it only declares its file.
+INPUT_SCHEMAS = {
+    'sales': {
+        'file': 'sales_total.csv',
+        'dtype': {
+            'customer': str, 'sku': str, 'item': str, 'category': str, 'brand': str,
+            'shape': str, 'size_capacity': str, 'revenue': str, 'qty': str, 'price': str,
+        },
+        'parse_dates': ['date'],
+        'date_format': '%m/%d/%Y',
+    },
+    'buyer': {
+        'file': 'db_buyer.csv',
+        'dtype': {'Customer': str, 'Name': str, 'Type': str},
+    },
+    'item_master': {
+        'file': 'item_master.csv',
+        'header': 1,  # Row 0 is a description row; the real header is row 1
+        'dtype': {
+            'SKU': str, 'ProductName_Short': str, 'Brand': str, 'Category': str,
+            'Sub_Category': str, 'Size_Capacity': str, 'Shape': str,
+            'UnitsPerCase': 'float64', 'CBM_per_Unit': 'float64', 'Max_Cartons_per_Pallet': 'float64',
+            'FOB_Cost': 'float64', 'LandedCost': 'float64', 'WholesalePrice': 'float64',
+        },
+    },
+    'tjx_item': {
+        'file': 'tjx_item.csv',
+        # Header cells wrap over lines; load_tjx_items matches them whitespace-collapsed
+        'dtype': {
+            'SKU': str, 'Description': str, 'Regular Local Cost (Current Cost)': str,
+            'Vendor Pack': str, 'Brand': str, 'Category': str,
+        },
+    },
+    'poe': {
+        'file': 'poe.csv',
+    },
+}
+
+# Bump whenever build_sales_frame changes the layout of the cached frame
+CACHE_FORMAT_VERSION = 6
+
+# Input files that the cleaned sales frame is built from
+SALES_INPUTS = ['sales_total.csv', 'db_buyer.csv', 'item_master.csv']
+
+# Every input file load_all_inputs reads
+ALL_INPUTS = SALES_INPUTS + ['tjx_item.csv', 'poe.csv']
+
+# Numeric item_master.csv columns carried by the SKU dimension
+SKU_ATTRIBUTES = ['FOB_Cost', 'LandedCost', 'WholesalePrice', 'CBM_per_Unit', 'UnitsPerCase', 'Max_Cartons_per_Pallet']
+
+# Column dtypes of the cleaned sales frame returned by load_data.
+# Low-cardinality strings are categoricals, date parts use the smallest
+# integer that fits, and revenue stays float64 because it is summed to the
+# dollar over the whole history. Rows without a date are dropped (and
+# logged) before the cast, so the date parts never hold missing values. The raw revenue/qty/price strings and the
+# duplicate Customer join key are not kept.
+SALES_FRAME_SCHEMA = {
+    'date': 'datetime64[ns]',
+    'date_key': 'int32',
+    'year': 'int16',
+    'month': 'int8',
+    'quarter': 'int8',
+    'customer': 'category',
+    'Name': 'category',
+    'Type': 'category',
+    'sku': 'category',
+    'item': 'category',
+    'item_display': 'category',
+    'category': 'category',
+    'brand': 'category',
+    'shape': 'category',
+    'size_capacity': 'category',
+    'revenue_clean': 'float64',
+    'qty_clean': 'int32',
+    'price_clean': 'float32',
+    'is_tjx': 'bool',
+}
+
+# OBD sub-channels, checked in order against the lower-cased customer name
+OBD_SUBCHANNELS = [
+    ('OBD-FB', ['french bull', 'fb']),
+    ('OBD-NF', ['neoflam', 'nf']),
+]
+
+def build_obd_channel_lookup(customers):
+    """Map each distinct customer name to its OBD sub-channel"""
+    names = pd.Index(pd.unique(customers))
+    lower = pd.Series(names.astype(str).str.lower(), index=names)
     
-    # Merge
-    df = sales.merge(buyers, left_on='customer', right_on='Customer', how='left')
-    
-    # Fill missing types
-    df['Type'] = df['Type'].fillna('Other')
-    
-    # Subdivide OBD into French Bull and Neoflam
-    def classify_obd(row):
-        if row['Type'] == 'OBD':
-            customer_lower = str(row['customer']).lower()
-            if 'french bull' in customer_lower or 'fb' in customer_lower:
-                return 'OBD-FB'
-            elif 'neoflam' in customer_lower or 'nf' in customer_lower:
-                return 'OBD-NF'
-            else:
-                return 'OBD-Other'
-        return row['Type']
+    conditions = [
+        lower.str.contains('|'.join(keywords), regex=True).to_numpy()
+        for _, keywords in OBD_SUBCHANNELS
+    ]
+    labels = [label for label, _ in OBD_SUBCHANNELS]
+    
+    return pd.Series(np.select(conditions, labels, default='OBD-Other'), index=names)
+
+def classify_channels(types, customers):
+    """Split OBD into OBD-FB / OBD-NF / OBD-Other, classifying each customer once"""
+    types = types.copy()
+    is_obd = (types == 'OBD').to_numpy()
     
-    df['Type'] = df.apply(classify_obd, axis=1)
+    if is_obd.any():
+        obd_customers = customers[is_obd]
+        lookup = build_obd_channel_lookup(obd_customers)
+        types[is_obd] = obd_customers.map(lookup).to_numpy()
     
-    # Filter out non-numeric SKUs (like "Discount", "Other Income", etc.)
-    df['sku_str'] = df['sku'].astype(str)
-    df = df[df['sku_str'].str.match(r'^\d+', na=False) | df['sku_str'].str.contains('CP$|NT$|NB$', na=False, regex=True)].copy()
+    return types
+
+def create_display_name(row):
+    """Build the "brand shape size" display name for one item"""
+    brand = str(row['brand']) if pd.notna(row['brand']) else ''
+    shape = str(row['shape']) if pd.notna(row['shape']) else ''
+    size = str(row['size_capacity']) if pd.notna(row['size_capacity']) else ''
     
-    # Create item display name: brand shape size
-    def create_display_name(row):
-        brand = str(row['brand']) if pd.notna(row['brand']) else ''
-        shape = str(row['shape']) if pd.notna(row['shape']) else ''
-        size = str(row['size_capacity']) if pd.notna(row['size_capacity']) else ''
+    parts = [p for p in [brand, shape, size] if p and p != 'nan']
+    if parts:
+        return ' '.join(parts)
+    else:
+        # If no brand/shape/size, use item name or SKU
+        if pd.notna(row['item']) and str(row['item']) != 'nan':
+            return str(row['item'])
+        else:
+            return f"SKU {row['sku']}"
+
+def flag_tjx_group(customers):
+    """TJX group membership (HomeGoods French Bull excluded), evaluated once per customer"""
+    names = pd.Index(pd.unique(customers))
+    labels = names.astype(str)
+    in_group = labels.str.contains('TJX', regex=False) & ~labels.str.contains('French Bull', regex=False)
+    
+    return customers.map(pd.Series(in_group, index=names)).astype(bool)
+
+def parse_accounting(values, column=None, report=None):
+    """Parse accounting-formatted numbers such as "$1,234.56" or "(12.50)".
+
+    Each distinct string is cleaned once with a single regex pass and the
+    result is mapped back through factorized codes. Blanks and values that
+    cannot be parsed become 0; when ``report`` is given, their counts are
+    added to ``report[column]``.
+    """
+    codes, uniques = pd.factorize(values)
+    text = pd.Series(np.asarray(uniques, dtype=object)).astype(str)
+    
+    # Drop "$", thousands separators and whitespace; "(x)" means -x
+    cleaned = text.str.replace(r'[$,\s]', '', regex=True)
+    negative = cleaned.str.startswith('(') & cleaned.str.endswith(')')
+    cleaned = cleaned.where(~negative, '-' + cleaned.str[1:-1])
+    
+    numbers = pd.to_numeric(cleaned, errors='coerce').to_numpy(dtype='float64')
+    blank = (cleaned == '').to_numpy()
+    failed = np.isnan(numbers) & ~blank
+    numbers = np.append(np.nan_to_num(numbers, nan=0.0), 0.0)  # Extra slot for missing values (code -1)
+    
+    if report is not None:
+        counts = np.bincount(codes + 1, minlength=len(uniques) + 1)[1:]
+        entry = report.setdefault(column, {'blank': 0, 'unparseable': 0, 'examples': []})
+        entry['blank'] += int((codes == -1).sum() + counts[blank].sum())
+        entry['unparseable'] += int(counts[failed].sum())
+        entry['examples'] = (entry['examples'] + text[failed].tolist())[:5]
+    
+    return pd.Series(numbers[codes], index=values.index)
+
+# First calendar month of the fiscal year; 1 makes fiscal periods match months
+FISCAL_YEAR_START_MONTH = 1
+
+def build_date_dimension(dates):
+    """Calendar attributes for each distinct date, keyed by an integer YYYYMMDD date_key"""
+    days = pd.DatetimeIndex(pd.unique(pd.Series(dates).dropna())).sort_values()
+    iso = days.isocalendar()
+    
+    # Fiscal years are named after the calendar year they end in
+    fiscal_shift = (13 - FISCAL_YEAR_START_MONTH) % 12
+    fiscal_months = days.year * 12 + (days.month - 1) + fiscal_shift
+    
+    return pd.DataFrame({
+        'date_key': (days.year * 10000 + days.month * 100 + days.day).astype('int32'),
+        'date': days,
+        'year': days.year.astype('int16'),
+        'month': days.month.astype('int8'),
+        'quarter': days.quarter.astype('int8'),
+        'month_key': (days.year * 100 + days.month).astype('int32'),
+        'iso_year': iso['year'].to_numpy().astype('int16'),
+        'iso_week': iso['week'].to_numpy().astype('int8'),
+        'fiscal_year': (fiscal_months // 12).astype('int16'),
+        'fiscal_period': (fiscal_months % 12 + 1).astype('int8'),
+    })
+
+# Date attribute value of a missing date; no year/month filter matches it
+MISSING_DATE_ATTRIBUTE = 0
+
+def add_date_attributes(df, columns, date_dim=None):
+    """Add date-dimension columns to a frame via its factorized dates, not per-row .dt calls.
+
+    Rows without a date get MISSING_DATE_ATTRIBUTE in every added column.
+    """
+    codes, uniques = pd.factorize(df['date'])
+    if date_dim is None:
+        date_dim = build_date_dimension(uniques)
+    
+    # Dimension row of each date; -1 (missing, or not in date_dim) reads the extra slot
+    positions = pd.DatetimeIndex(date_dim['date']).get_indexer(pd.DatetimeIndex(uniques))
+    rows = np.append(positions, -1)[codes]
+    for column in columns:
+        values = date_dim[column].to_numpy()
+        df[column] = np.append(values, np.array(MISSING_DATE_ATTRIBUTE, dtype=values.dtype))[rows]
+    
+    return df
+
+# Columns that fully determine an item's display name
+ITEM_DISPLAY_KEYS = ['sku', 'brand', 'shape', 'size_capacity', 'item']
+
+def build_item_display(df):
+    """Build item_display once per distinct item and map it back as a Categorical"""
+    items = df[ITEM_DISPLAY_KEYS].drop_duplicates()
+    items['item_display'] = [create_display_name(row) for row in items.to_dict('records')]
+    
+    # Left merge keeps row order; NaN keys match NaN keys
+    names = df[ITEM_DISPLAY_KEYS].merge(items, on=ITEM_DISPLAY_KEYS, how='left')['item_display']
+    
+    return pd.Categorical(names.to_numpy())
+
+@timed()
+def read_input(name, data_dir=DATA_DIR, source=None, **kwargs):
+    """Read one CSV input, projecting and typing columns as INPUT_SCHEMAS declares.
+
+    ``source`` overrides the file path (e.g. an in-memory buffer); extra
+    keyword arguments go to pd.read_csv.
+    """
+    schema = INPUT_SCHEMAS[name]
+    columns = list(schema['dtype']) + schema.get('parse_dates', [])
+    
+    # Only the C parser can stream chunks, and pyarrow may not be installed
+    engine = CSV_ENGINE
+    if kwargs.get('chunksize') is not None or feather is None:
+        engine = 'c'
+    
+    options = {
+        'usecols': columns,
+        'dtype': schema['dtype'],
+        'header': schema.get('header', 'infer'),
+        'parse_dates': schema.get('parse_dates'),
+        'date_format': schema.get('date_format'),
+        'engine': engine,
+    }
+    options.update(kwargs)
+    
+    if source is None:
+        source = os.path.join(data_dir, schema['file'])
+    return pd.read_csv(source, **options)
+
+def hash_file(path, size=None):
+    """SHA-256 hash object over a file's contents, or over its first ``size`` bytes"""
+    digest = hashlib.sha256()
+    remaining = size
+    
+    with open(path, 'rb') as f:
+        while remaining is None or remaining > 0:
+            block = f.read(1 << 20 if remaining is None else min(1 << 20, remaining))
+            if not block:
+                break
+            digest.update(block)
+            if remaining is not None:
+                remaining -= len(block)
+    
+    return digest
+
+def fingerprint_inputs(data_dir=DATA_DIR, known=None, names=SALES_INPUTS):
+    """Size, mtime and content hash of every sales input.
+
+    Files whose size and mtime match ``known`` reuse the recorded hash
+    instead of being re-read.
+    """
+    known = known or {}
+    fingerprints = {}
+    
+    for name in names:
+        stat = os.stat(os.path.join(data_dir, name))
+        previous = known.get(name, {})
         
-        parts = [p for p in [brand, shape, size] if p and p != 'nan']
-        if parts:
-            return ' '.join(parts)
+        if previous.get('size') == stat.st_size and previous.get('mtime_ns') == stat.st_mtime_ns:
+            sha256 = previous['sha256']
         else:
-            # If no brand/shape/size, use item name or SKU
-            if pd.notna(row['item']) and str(row['item']) != 'nan':
-                return str(row['item'])
-            else:
-                return f"SKU {row['sku']}"
+            sha256 = hash_file(os.path.join(data_dir, name)).hexdigest()
+        
+        fingerprints[name] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha256}
+    
+    return fingerprints
+
+@timed()
+def get_input_signature(data_dir=DATA_DIR, names=SALES_INPUTS):
+    """Cheap (name, size, mtime) key of the sales inputs, for in-process caches"""
+    signature = []
+    for name in names:
+        stat = os.stat(os.path.join(data_dir, name))
+        signature.append((name, stat.st_size, stat.st_mtime_ns))
+    return tuple(signature)
+
+def get_data_version(fingerprints):
+    """Short version key derived from the content hashes of all inputs"""
+    digest = hashlib.sha256(f'format:{CACHE_FORMAT_VERSION}'.encode())
+    for name in sorted(fingerprints):
+        digest.update(f"{name}:{fingerprints[name]['sha256']}".encode())
+    return digest.hexdigest()[:16]
+
+def read_cache_manifest(cache_dir=CACHE_DIR):
+    """Return the cache manifest, or an empty dict if there is none"""
+    try:
+        with open(os.path.join(cache_dir, 'manifest.json'), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def write_feather_atomic(df, path):
+    """Write a Feather file via a temp file so readers never see a partial write.
+
+    Uncompressed and as a single record batch, so every column is one
+    contiguous buffer that read_feather_mapped can hand out without copying.
+    """
+    tmp_path = os.path.join(os.path.dirname(path), f'.{os.path.basename(path)}.{os.getpid()}.tmp')
+    feather.write_feather(df, tmp_path, compression='uncompressed', chunksize=max(len(df), 1))
+    os.replace(tmp_path, path)
+
+def read_feather_mapped(path):
+    """Read a Feather file through a memory map.
+
+    Numeric and datetime columns come back as read-only views of the mapped
+    file, so every process serving the same cache file shares one copy in
+    the OS page cache. Categorical codes and bool columns are still copied.
+    """
+    return feather.read_table(path, memory_map=True).to_pandas(split_blocks=True)
+
+def write_cached_dataset(df, aggregates, fingerprints, cache_dir=CACHE_DIR):
+    """Write the cleaned frame and its aggregates to Feather and point the manifest at them"""
+    os.makedirs(cache_dir, exist_ok=True)
+    version = get_data_version(fingerprints)
+    
+    manifest = {
+        'format': CACHE_FORMAT_VERSION,
+        'version': version,
+        'file': f'sales-{version}.feather',
+        'rows': len(df),
+        'inputs': fingerprints,
+        'aggregates': {},
+    }
+    write_feather_atomic(df, os.path.join(cache_dir, manifest['file']))
+    
+    for name, aggregate in aggregates.items():
+        filename = f'{name}-{version}.feather'
+        write_feather_atomic(aggregate.reset_index(), os.path.join(cache_dir, filename))
+        manifest['aggregates'][name] = {'file': filename, 'index': list(aggregate.index.names)}
+    
+    tmp_path = os.path.join(cache_dir, f'.manifest.json.{os.getpid()}.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(cache_dir, 'manifest.json'))
+    
+    # Drop files left behind by older versions
+    remove_stale_cache_files(cache_dir, ['sales'] + list(aggregates), version)
+    
+    return manifest
+
+def remove_stale_cache_files(cache_dir, prefixes, version):
+    """Delete '<prefix>-<other version>.feather' files for the given prefixes"""
+    for old in os.listdir(cache_dir):
+        prefix, _, rest = old.partition('-')
+        if prefix in prefixes and rest.endswith('.feather') and rest != f'{version}.feather':
+            try:
+                os.remove(os.path.join(cache_dir, old))
+            except OSError:
+                pass
+
+@timed()
+def read_cached_dataset(manifest, cache_dir=CACHE_DIR):
+    """Return (frame, aggregates) for a manifest written by this code, else None"""
+    if manifest.get('format') != CACHE_FORMAT_VERSION:
+        return None
+    
+    try:
+        df = read_feather_mapped(os.path.join(cache_dir, manifest['file']))
+        aggregates = {}
+        for name, entry in manifest['aggregates'].items():
+            aggregate = read_feather_mapped(os.path.join(cache_dir, entry['file']))
+            aggregates[name] = aggregate.set_index(entry['index'])
+    except (OSError, KeyError, ValueError):
+        return None
+    
+    if set(aggregates) != set(CACHED_AGGREGATES):
+        return None
+    
+    return df, aggregates
+
+@timed()
+def build_aggregates(df):
+    """Build every aggregate in CACHED_AGGREGATES from a sales frame"""
+    return {name: build(df) for name, build in CACHED_AGGREGATES.items()}
+
+def merge_aggregates(aggregates, new_aggregates):
+    """Add aggregates of appended rows onto existing ones, by sum unless AGGREGATE_MERGES says otherwise"""
+    merged = {}
+    for name, aggregate in aggregates.items():
+        if name in AGGREGATE_MERGES:
+            merged[name] = AGGREGATE_MERGES[name](aggregate, new_aggregates[name])
+            continue
+        combined = pd.concat([aggregate, new_aggregates[name]])
+        merged[name] = combined.groupby(level=list(aggregate.index.names), observed=True).sum()
+    return merged
+
+# How long a file must keep its size and mtime before its last line counts as complete
+APPEND_SETTLE_SECONDS = 1.0
+
+def file_settled(path, stat, seconds=APPEND_SETTLE_SECONDS):
+    """True when ``path`` still matches ``stat`` (size, mtime) and has for ``seconds``.
+
+    Files last modified longer ago than that are settled without waiting.
+    """
+    age = time.time() - stat.st_mtime_ns / 1e9
+    if age < seconds:
+        time.sleep(seconds - age)
+    current = os.stat(path)
+    return (current.st_size, current.st_mtime_ns) == (stat.st_size, stat.st_mtime_ns)
+
+def read_appended_sales(data_dir, previous):
+    """Return (tail bytes, fingerprint) if sales_total.csv only had rows appended, else None.
+
+    The previously ingested byte size is the watermark: the file must have
+    grown, its first ``previous['size']`` bytes must still hash to the
+    recorded SHA-256 and end on a line break. A tail without a final line
+    break is taken whole only once the file has settled (see file_settled);
+    while it is still being written, None sends the caller to a full rebuild.
+    """
+    path = os.path.join(data_dir, 'sales_total.csv')
+    stat = os.stat(path)
+    if not previous or stat.st_size <= previous['size']:
+        return None
+    
+    digest = hash_file(path, previous['size'])
+    if digest.hexdigest() != previous['sha256']:
+        return None
+    
+    with open(path, 'rb') as f:
+        f.seek(previous['size'] - 1)
+        if f.read(1) != b'\n':
+            return None
+        tail = f.read()
+    
+    # The export may end without a line break, or be caught mid-row
+    if not tail.endswith(b'\n') and not file_settled(path, stat):
+        return None
+    
+    digest.update(tail)
+    fingerprint = {'size': previous['size'] + len(tail), 'mtime_ns': stat.st_mtime_ns, 'sha256': digest.hexdigest()}
+    return tail, fingerprint
+
+@timed()
+def append_sales_rows(df, aggregates, tail, data_dir=DATA_DIR):
+    """Clean appended raw CSV bytes and add them to the frame and its aggregates"""
+    path = os.path.join(data_dir, 'sales_total.csv')
+    with open(path, 'rb') as f:
+        header = f.readline()
+    
+    buyers = read_input('buyer', data_dir)
+    whitelist = build_sku_whitelist(data_dir)
+    report, unmatched = {}, {}
+    new_rows = clean_sales_chunk(read_input('sales', source=io.BytesIO(header + tail)), buyers, report, whitelist, unmatched)
+    log_parse_report(report)
+    log_unmatched_skus(unmatched)
+    
+    df = concat_sales_frames([df, new_rows])
+    aggregates = merge_aggregates(aggregates, build_aggregates(new_rows))
+    return df, aggregates
+
+@timed()
+def save_cached_dataset(df, aggregates, fingerprints, cache_dir=CACHE_DIR):
+    """Write the cache and return (frame, aggregates) mapped from it.
+
+    Serving the mapped copy lets the in-memory build be freed, so the
+    process that rebuilt shares pages with every other reader. Falls back to
+    the given frames when the cache dir is read-only.
+    """
+    try:
+        manifest = write_cached_dataset(df, aggregates, fingerprints, cache_dir)
+    except OSError:
+        return df, aggregates
+    
+    mapped = read_cached_dataset(manifest, cache_dir)
+    return (df, aggregates) if mapped is None else mapped
+
+@timed()
+def load_dataset(data_dir=DATA_DIR, cache_dir=CACHE_DIR, use_cache=True):
+    """Load the cleaned sales frame and its aggregates, reusing the on-disk cache.
+
+    Unchanged inputs are served from the cache. When rows were only
+    appended to sales_total.csv, just the new tail is cleaned and added to
+    the cached frame and aggregates. Anything else triggers a full rebuild.
+    Frames served from the cache are memory-mapped and must be treated as
+    read-only. aggregates['date_dim'] is the date dimension (see
+    build_date_dimension) of every sales date, keyed by date_key.
+    """
+    if not use_cache or feather is None:
+        df = build_sales_frame(data_dir)
+        return df, build_aggregates(df)
+    
+    manifest = read_cache_manifest(cache_dir)
+    known = manifest.get('inputs', {})
+    cached = read_cached_dataset(manifest, cache_dir)
+    
+    if cached is not None:
+        appended = read_appended_sales(data_dir, known.get('sales_total.csv'))
+        if appended is not None:
+            lookups = [name for name in SALES_INPUTS if name != 'sales_total.csv']
+            fingerprints = fingerprint_inputs(data_dir, known, names=lookups)
+            if all(name in known and fingerprints[name]['sha256'] == known[name]['sha256'] for name in lookups):
+                tail, fingerprints['sales_total.csv'] = appended
+                df, aggregates = append_sales_rows(*cached, tail, data_dir)
+                return save_cached_dataset(df, aggregates, fingerprints, cache_dir)
+    
+    fingerprints = fingerprint_inputs(data_dir, known)
+    if cached is not None and manifest.get('version') == get_data_version(fingerprints):
+        return cached
+    
+    df = build_sales_frame(data_dir)
+    aggregates = build_aggregates(df)
+    return save_cached_dataset(df, aggregates, fingerprints, cache_dir)
+
+@timed()
+def load_all_inputs(data_dir=DATA_DIR, cache_dir=CACHE_DIR, use_cache=True):
+    """Load every input concurrently, returning {'sales', 'aggregates', 'tjx_items', 'poe'}.
+
+    The sales build (which itself reads db_buyer.csv and item_master.csv
+    alongside sales_total.csv), tjx_item.csv and poe.csv each get a thread.
+    The CSV parsers release the GIL, so a cold start takes about as long as
+    the largest input rather than the sum of all of them.
+    """
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        dataset = pool.submit(bind_timing(load_dataset), data_dir, cache_dir, use_cache)
+        tjx_items = pool.submit(bind_timing(load_tjx_items), data_dir)
+        poe = pool.submit(bind_timing(load_poe), data_dir, cache_dir, use_cache)
+        
+        df, aggregates = dataset.result()
+        return {'sales': df, 'aggregates': aggregates, 'tjx_items': tjx_items.result(), 'poe': poe.result()}
+
+def load_data(data_dir=DATA_DIR, cache_dir=CACHE_DIR, use_cache=True):
+    """Load the cleaned sales frame, reusing the on-disk cache when inputs are unchanged"""
+    return load_dataset(data_dir, cache_dir, use_cache)[0]
+
+@timed()
+def build_sales_frame(data_dir=DATA_DIR, chunksize=SALES_CHUNK_ROWS):
+    """Load and merge sales_total.csv with db_buyer.csv, one bounded chunk at a time.
+
+    db_buyer.csv and the item master load on worker threads while the first
+    sales chunk is parsed and precleaned; the merge waits for both.
+    """
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        buyers = pool.submit(bind_timing(read_input), 'buyer', data_dir)
+        whitelist = pool.submit(bind_timing(build_sku_whitelist), data_dir)
+        
+        if chunksize is None:
+            chunks = [read_input('sales', data_dir)]
+        else:
+            # The reader parses lazily, so each chunk's parse is timed as it is pulled
+            chunks = timed_iter('read_sales_chunk', read_input('sales', data_dir, chunksize=chunksize))
+        
+        # Each raw chunk is released as soon as its compact copy exists
+        report, unmatched = {}, {}
+        frames = []
+        for chunk in chunks:
+            chunk = preclean_sales_chunk(chunk, report)
+            frames.append(merge_sales_chunk(chunk, buyers.result(), whitelist.result(), unmatched))
     
-    df['item_display'] = df.apply(create_display_name, axis=1)
+    df = concat_sales_frames(frames)
+    log_parse_report(report)
+    log_unmatched_skus(unmatched)
     
     return df
 
-def calculate_kpis(df, year=2025):
+def log_parse_report(report):
+    """Log numeric values counted as 0 (blank or unparseable) and rows dropped as undated"""
+    for column, entry in report.items():
+        if entry.get('dropped'):
+            logger.warning("sales_total.csv: %d rows without a %s were dropped", entry['dropped'], column)
+        if entry.get('unparseable'):
+            logger.warning(
+                "sales_total.csv: %d %s values could not be parsed and were set to 0 (e.g. %s)",
+                entry['unparseable'], column, ', '.join(repr(v) for v in entry['examples'])
+            )
+        if entry.get('blank'):
+            logger.info("sales_total.csv: %d blank %s values were set to 0", entry['blank'], column)
+
+@timed()
+def build_sku_dimension(data_dir=DATA_DIR):
+    """item_master.csv as dense integer SKU codes with array-backed attributes.
+
+    Returns {'sku': Index of distinct SKUs, whose positions are the codes,
+    attribute: float64 array per SKU_ATTRIBUTES column}. Each array has one
+    extra trailing NaN, so code -1 (a SKU not in the master) reads as missing.
+    """
+    items = read_input('item_master', data_dir).dropna(subset=['SKU'])
+    items['SKU'] = items['SKU'].str.strip()
+    items = items.drop_duplicates('SKU')
+    
+    dim = {'sku': pd.Index(items['SKU'])}
+    for column in SKU_ATTRIBUTES:
+        dim[column] = np.append(items[column].to_numpy(dtype='float64'), np.nan)
+    return dim
+
+def build_sku_whitelist(data_dir=DATA_DIR):
+    """Distinct product SKUs listed in item_master.csv, as an Index for hashed lookups"""
+    return build_sku_dimension(data_dir)['sku']
+
+def is_product_sku(skus, whitelist=None, unmatched=None):
+    """Boolean mask of rows whose SKU is a product rather than e.g. "Discount".
+
+    SKUs are factorized once and each distinct value is looked up in the
+    item master ``whitelist``. Values missing from it fall back to the
+    pattern rules (leading digits, or a CP/NT/NB suffix). Row counts of
+    those misses are added to ``unmatched`` as {sku: [rows, kept]}.
+    """
+    codes, uniques = pd.factorize(skus)
+    uniques = pd.Series(uniques, dtype=object).str.strip()
+    
+    if whitelist is None:
+        in_master = np.zeros(len(uniques), dtype=bool)
+    else:
+        in_master = uniques.isin(whitelist).to_numpy()
+    
+    keep = in_master.copy()
+    misses = uniques[~in_master]
+    keep[~in_master] = (
+        misses.str.match(r'^\d+', na=False) | misses.str.contains('CP$|NT$|NB$', na=False, regex=True)
+    ).to_numpy()
+    
+    if unmatched is not None and whitelist is not None and len(misses):
+        rows = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        for position in np.flatnonzero(~in_master):
+            entry = unmatched.setdefault(uniques.iat[position], [0, bool(keep[position])])
+            entry[0] += int(rows[position])
+    
+    # Missing SKUs (code -1) are never products
+    return np.append(keep, False)[codes]
+
+def log_unmatched_skus(unmatched):
+    """Log SKUs missing from item_master.csv: kept by the pattern rules, or dropped"""
+    kept = {sku: rows for sku, (rows, is_kept) in unmatched.items() if is_kept}
+    dropped = {sku: rows for sku, (rows, is_kept) in unmatched.items() if not is_kept}
+    
+    if kept:
+        logger.warning(
+            "sales_total.csv: %d SKUs (%d rows) are not in item_master.csv but were kept by pattern: %s",
+            len(kept), sum(kept.values()), ', '.join(sorted(kept)[:20])
+        )
+    if dropped:
+        logger.info(
+            "sales_total.csv: dropped %d rows of %d non-product SKUs: %s",
+            sum(dropped.values()), len(dropped), ', '.join(sorted(dropped)[:20])
+        )
+
+@timed()
+def clean_sales_chunk(sales, buyers, report=None, whitelist=None, unmatched=None):
+    """Clean, classify and filter one chunk of raw sales rows.
+
+    ``whitelist`` is the item master SKU index (see build_sku_whitelist);
+    without it products are recognised by the SKU pattern rules alone.
+    """
+    return merge_sales_chunk(preclean_sales_chunk(sales, report), buyers, whitelist, unmatched)
+
+@timed()
+def preclean_sales_chunk(sales, report=None):
+    """The part of clean_sales_chunk that needs no other input: numbers and dates"""
+    # Parse the accounting-formatted numbers; blanks and bad values become 0
+    with timed_stage('parse_numbers', len(sales)):
+        sales['revenue_clean'] = parse_accounting(sales['revenue'], 'revenue', report)
+        sales['qty_clean'] = parse_accounting(sales['qty'], 'qty', report).astype(int)
+        sales['price_clean'] = parse_accounting(sales['price'], 'price', report)
+    
+    # Only the cleaned numbers are kept
+    sales = sales.drop(columns=['revenue', 'qty', 'price'])
+    
+    # Convert date and look up calendar attributes once per distinct date.
+    # Rows without a date belong to no year, so they are dropped and counted
+    with timed_stage('dates', len(sales)):
+        # read_input parses the declared format; values that do not match it leave text
+        if not pd.api.types.is_datetime64_any_dtype(sales['date']):
+            sales['date'] = pd.to_datetime(sales['date'])
+        undated = sales['date'].isna().to_numpy()
+        if undated.any():
+            if report is not None:
+                entry = report.setdefault('date', {'dropped': 0})
+                entry['dropped'] += int(undated.sum())
+            sales = sales[~undated].copy()
+        sales = add_date_attributes(sales, ['date_key', 'year', 'month', 'quarter'])
+    
+    return sales
+
+@timed()
+def merge_sales_chunk(sales, buyers, whitelist=None, unmatched=None):
+    """Join buyers onto a precleaned chunk, classify channels and keep product rows"""
+    # Merge
+    with timed_stage('merge_buyers', len(sales)):
+        df = sales.merge(buyers, left_on='customer', right_on='Customer', how='left')
+    
+    with timed_stage('classify_channels', len(df)):
+        # Fill missing types
+        df['Type'] = df['Type'].fillna('Other')
+        
+        # Subdivide OBD into French Bull and Neoflam
+        df['Type'] = classify_channels(df['Type'], df['customer'])
+        
+        # TJX group membership, used by the TJX deep-dive
+        df['is_tjx'] = flag_tjx_group(df['customer'])
+    
+    # Keep product rows: item master SKUs, else the pattern rules (drops "Discount", "Other Income", etc.)
+    with timed_stage('sku_filter', len(df)):
+        df = df[is_product_sku(df['sku'], whitelist, unmatched)].copy()
+    
+    # Create item display name: brand shape size
+    with timed_stage('item_display', len(df)):
+        df['item_display'] = build_item_display(df)
+    
+    return apply_sales_schema(df)
+
+def apply_sales_schema(df):
+    """Project the merged frame onto SALES_FRAME_SCHEMA with compact dtypes"""
+    df = df[list(SALES_FRAME_SCHEMA)].reset_index(drop=True)
+    return df.astype(SALES_FRAME_SCHEMA)
+
+@timed()
+def concat_sales_frames(frames):
+    """Concatenate compact sales frames, unifying their categorical columns"""
+    if not frames:
+        return pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in SALES_FRAME_SCHEMA.items()})
+    if len(frames) == 1:
+        return frames[0]
+    
+    # Chunks see different category sets; align them so concat stays categorical
+    for col, dtype in SALES_FRAME_SCHEMA.items():
+        if dtype != 'category':
+            continue
+        categories = frames[0][col].cat.categories
+        for frame in frames[1:]:
+            categories = categories.union(frame[col].cat.categories)
+        for frame in frames:
+            frame[col] = frame[col].cat.set_categories(categories)
+    
+    return pd.concat(frames, ignore_index=True)
+
+def build_sales_cube(df):
+    """Revenue and quantity totals per (year, Type), built in a single pass"""
+    return df.groupby(['year', 'Type'], observed=True)[['revenue_clean', 'qty_clean']].sum()
+
+def build_monthly_trend(df):
+    """Revenue, quantity and order (row) count per (year, month, Type)"""
+    return df.groupby(['year', 'month', 'Type'], observed=True).agg(
+        revenue_clean=('revenue_clean', 'sum'),
+        qty_clean=('qty_clean', 'sum'),
+        orders=('revenue_clean', 'size'),
+    )
+
+def get_monthly_trend(monthly_trend, year, channel):
+    """One year of one channel's monthly trend, labelled YYYY-MM, in month order"""
+    keys = monthly_trend.index
+    mask = (keys.get_level_values('year') == year) & (keys.get_level_values('Type') == channel)
+    
+    trend = monthly_trend[mask].droplevel(['year', 'Type']).sort_index().reset_index()
+    trend.insert(0, 'label', [f'{year}-{month:02d}' for month in trend['month']])
+    return trend
+
+def build_date_aggregate(df):
+    """The date dimension of every date in the frame, indexed by date_key.
+
+    Charts join on date_key (or pass it to add_date_attributes after
+    reset_index) for ISO-week or fiscal grouping without re-deriving them.
+    """
+    date_dim = build_date_dimension(df['date']).set_index('date_key')
+    # set_index widens int32 keys to int64 except on one-row frames; keep it uniform
+    date_dim.index = date_dim.index.astype('int64')
+    return date_dim
+
+def merge_date_dimensions(date_dim, new_date_dim):
+    """Union of two date dimensions; a date in both has the same attributes"""
+    combined = pd.concat([date_dim, new_date_dim])
+    return combined[~combined.index.duplicated()].sort_index()
+
+# Aggregates cached next to the cleaned frame, one Feather file each per
+# data version. Appended rows are merged in by summing, so every entry must
+# be a groupby-sum or count unless AGGREGATE_MERGES gives its own merge.
+CACHED_AGGREGATES = {
+    'sales_cube': build_sales_cube,
+    'monthly_trend': build_monthly_trend,
+    'date_dim': build_date_aggregate,
+}
+
+AGGREGATE_MERGES = {
+    'date_dim': merge_date_dimensions,
+}
+
+@timed()
+def build_partition_index(df):
+    """Row positions of every (year, Type) partition, built in a single pass"""
+    groups = df.groupby(['year', 'Type'], observed=True).indices
+    return {(int(year), str(channel)): positions for (year, channel), positions in groups.items()}
+
+def get_partition(df, partitions, year, types=None):
+    """Rows for one year and optionally one channel (or list of channels), in frame order"""
+    if types is None:
+        keys = [key for key in partitions if key[0] == year]
+    elif isinstance(types, str):
+        keys = [(year, types)]
+    else:
+        keys = [(year, channel) for channel in types]
+    
+    positions = [partitions[key] for key in keys if key in partitions]
+    if not positions:
+        return df.iloc[:0]
+    if len(positions) == 1:
+        return df.iloc[positions[0]]
+    return df.iloc[np.sort(np.concatenate(positions))]
+
+def select_year(df, year, partitions=None):
+    """Rows for one year, via the partition index when one is given"""
+    if partitions is None:
+        return df[df['year'] == year]
+    return get_partition(df, partitions, year)
+
+@timed()
+def build_tjx_view(df, active_skus=None):
+    """TJX sub-frame plus the per-year aggregates behind the TJX deep-dive charts.
+
+    With ``active_skus`` (see get_active_tjx_skus) only active TJX items are kept.
+    """
+    mask = df['is_tjx'].to_numpy()
+    if active_skus is not None:
+        mask = mask & is_active_tjx_item(df['sku'], active_skus)
+    tjx = df[mask]
+    
+    return {
+        'frame': tjx,
+        'buyers': tjx.groupby(['year', 'Name', 'customer'], observed=True)[['revenue_clean']].sum(),
+        'categories': tjx.groupby(['year', 'category'], observed=True)[['revenue_clean', 'qty_clean']].sum(),
+        'brands': tjx.groupby(['year', 'category', 'brand'], observed=True)[['qty_clean', 'revenue_clean']].sum(),
+        'brand_sizes': tjx.groupby(['year', 'category', 'brand', 'size_capacity'], observed=True)[['qty_clean', 'revenue_clean']].sum(),
+    }
+
+def normalize_header(name):
+    """Collapse the line breaks and runs of spaces inside a CSV header cell"""
+    return ' '.join(str(name).split())
+
+@timed()
+def load_tjx_items(data_dir=DATA_DIR):
+    """Active TJX item list from tjx_item.csv, with normalized headers and a numeric cost.
+
+    Header cells that wrap over lines (the cost header) are matched
+    whitespace-collapsed, blank spacer rows are dropped and the
+    $-formatted cost is parsed with parse_accounting.
+    """
+    schema = INPUT_SCHEMAS['tjx_item']
+    path = os.path.join(data_dir, schema['file'])
+    
+    raw_columns = pd.read_csv(path, nrows=0).columns
+    names = {raw: normalize_header(raw) for raw in raw_columns if normalize_header(raw) in schema['dtype']}
+    
+    items = read_input(
+        'tjx_item', data_dir,
+        usecols=list(names), dtype={raw: schema['dtype'][name] for raw, name in names.items()},
+    ).rename(columns=names)
+    
+    items = items.dropna(subset=['SKU'])
+    items['SKU'] = items['SKU'].str.strip()
+    items = items[items['SKU'] != ''].reset_index(drop=True)
+    items['Regular Local Cost (Current Cost)'] = parse_accounting(items['Regular Local Cost (Current Cost)'], 'cost')
+    
+    return items
+
+def get_active_tjx_skus(tjx_items):
+    """Active TJX SKUs as an Index, for hashed membership tests"""
+    return pd.Index(tjx_items['SKU'].unique())
+
+def is_active_tjx_item(skus, active_skus):
+    """Row mask of a categorical sku column: True where the SKU is an active TJX item"""
+    active = skus.cat.categories.str.strip().isin(active_skus)
+    # Missing SKUs (category code -1) pick up the trailing False
+    return np.append(active, False)[skus.cat.codes.to_numpy()]
+
+def get_tjx_aggregate(tjx_view, name, year, category=None):
+    """One year (and optionally one category) of a TJX view aggregate, as a flat frame"""
+    aggregate = tjx_view[name]
+    keys, levels = (year,), ['year']
+    if category is not None:
+        keys, levels = (year, category), ['year', 'category']
+    
+    mask = np.ones(len(aggregate), dtype=bool)
+    for key, level in zip(keys, levels):
+        mask &= (aggregate.index.get_level_values(level) == key)
+    
+    return aggregate[mask].droplevel(levels).reset_index()
+
+def get_tjx_buyer_comparison(tjx_view, year=2025, prior_year=2024):
+    """TJX buyer revenue for two years with growth, sorted by current-year revenue"""
+    buyers_current = get_tjx_aggregate(tjx_view, 'buyers', year)
+    buyers_current.columns = ['Name', 'customer', f'revenue_{year}']
+    
+    buyers_prior = get_tjx_aggregate(tjx_view, 'buyers', prior_year)
+    buyers_prior.columns = ['Name', 'customer', f'revenue_{prior_year}']
+    
+    comparison = buyers_current.merge(buyers_prior, on=['Name', 'customer'], how='outer').fillna(0)
+    comparison['growth'] = ((comparison[f'revenue_{year}'] - comparison[f'revenue_{prior_year}']) / comparison[f'revenue_{prior_year}'].replace(0, 1)) * 100
+    comparison['display_name'] = comparison['Name'].fillna(comparison['customer'])
+    comparison = comparison.sort_values(f'revenue_{year}', ascending=False)
+    
+    return comparison
+
+def get_channel_revenue(cube, year):
+    """Revenue per channel group for one year, read from the sales cube"""
+    years = cube.index.get_level_values('year')
+    by_type = cube.loc[years == year, 'revenue_clean'].droplevel('year')
+    types = by_type.index.astype(str)
+    
+    return {
+        'total': by_type.sum(),
+        'mmd': by_type[types == 'MMD'].sum(),
+        'fob': by_type[types == 'DI'].sum(),
+        'emd': by_type[types == 'EMD'].sum(),
+        'obd': by_type[types.str.startswith('OBD')].sum(),
+        'obd_fb': by_type[types == 'OBD-FB'].sum(),
+        'obd_nf': by_type[types == 'OBD-NF'].sum(),
+    }
+
+@timed()
+def calculate_kpis(df, year=2025, cube=None):
     """Calculate KPI metrics for dashboard"""
-    df_year = df[df['year'] == year]
+    if cube is None:
+        cube = build_sales_cube(df)
+    
+    revenue = get_channel_revenue(cube, year)
     
     kpis = {
-        'total_sales': df_year['revenue_clean'].sum(),
-        'mmd_sales': df_year[df_year['Type'] == 'MMD']['revenue_clean'].sum(),
-        'fob_sales': df_year[df_year['Type'] == 'DI']['revenue_clean'].sum(),
-        'emd_sales': df_year[df_year['Type'] == 'EMD']['revenue_clean'].sum(),
-        'obd_sales': df_year[df_year['Type'].str.startswith('OBD', na=False)]['revenue_clean'].sum(),
-        'obd_fb_sales': df_year[df_year['Type'] == 'OBD-FB']['revenue_clean'].sum(),
-        'obd_nf_sales': df_year[df_year['Type'] == 'OBD-NF']['revenue_clean'].sum()
+        'total_sales': revenue['total'],
+        'mmd_sales': revenue['mmd'],
+        'fob_sales': revenue['fob'],
+        'emd_sales': revenue['emd'],
+        'obd_sales': revenue['obd'],
+        'obd_fb_sales': revenue['obd_fb'],
+        'obd_nf_sales': revenue['obd_nf']
     }
     
     return kpis
 
-def calculate_yoy_comparison(df):
+@timed()
+def calculate_yoy_comparison(df, cube=None):
     """Calculate year-over-year comparison"""
-    stats_2024 = {
-        'total': df[df['year'] == 2024]['revenue_clean'].sum(),
-        'mmd': df[(df['year'] == 2024) & (df['Type'] == 'MMD')]['revenue_clean'].sum(),
-        'fob': df[(df['year'] == 2024) & (df['Type'] == 'DI')]['revenue_clean'].sum(),
-        'emd': df[(df['year'] == 2024) & (df['Type'] == 'EMD')]['revenue_clean'].sum(),
-        'obd': df[(df['year'] == 2024) & (df['Type'].str.startswith('OBD', na=False))]['revenue_clean'].sum(),
-        'obd_fb': df[(df['year'] == 2024) & (df['Type'] == 'OBD-FB')]['revenue_clean'].sum(),
-        'obd_nf': df[(df['year'] == 2024) & (df['Type'] == 'OBD-NF')]['revenue_clean'].sum(),
-    }
+    if cube is None:
+        cube = build_sales_cube(df)
     
-    stats_2025 = {
-        'total': df[df['year'] == 2025]['revenue_clean'].sum(),
-        'mmd': df[(df['year'] == 2025) & (df['Type'] == 'MMD')]['revenue_clean'].sum(),
-        'fob': df[(df['year'] == 2025) & (df['Type'] == 'DI')]['revenue_clean'].sum(),
-        'emd': df[(df['year'] == 2025) & (df['Type'] == 'EMD')]['revenue_clean'].sum(),
-        'obd': df[(df['year'] == 2025) & (df['Type'].str.startswith('OBD', na=False))]['revenue_clean'].sum(),
-        'obd_fb': df[(df['year'] == 2025) & (df['Type'] == 'OBD-FB')]['revenue_clean'].sum(),
-        'obd_nf': df[(df['year'] == 2025) & (df['Type'] == 'OBD-NF')]['revenue_clean'].sum(),
-    }
+    stats_2024 = get_channel_revenue(cube, 2024)
+    stats_2025 = get_channel_revenue(cube, 2025)
     
     comparison = {}
     for key in stats_2024.keys():
@@ -130,63 +1016,165 @@ def calculate_yoy_comparison(df):
     
     return comparison
 
-def get_top_buyers_by_channel(df, year=2025, top_n=5):
-    """Get top N buyers for each channel"""
-    df_year = df[df['year'] == year]
+def aggregate_frame_pandas(df, keys, aggregations):
+    """aggregate_frame on pandas groupby"""
+    return df.groupby(keys, observed=True).agg(aggregations).reset_index()
+
+def aggregation_function(values, how):
+    """Function key for one aggregation: integer and bool sums ('int_sum') are widened to int64"""
+    if how == 'sum' and (pd.api.types.is_integer_dtype(values) or pd.api.types.is_bool_dtype(values)):
+        return 'int_sum'
+    return how
+
+def aggregate_frame_duckdb(df, keys, aggregations):
+    """aggregate_frame as one multithreaded DuckDB query over the frame.
+
+    Rows come back in the same key order as pandas (categoricals become
+    DuckDB enums, which sort by category order) and keys and float sums are
+    cast back to the frame's dtypes. Float sums use DuckDB's compensated
+    fsum, so they agree with pandas' compensated groupby sum to the last bit
+    or so; integer sums are exact BIGINT sums, returned as int64.
+    """
+    quoted = [f'"{key}"' for key in keys]
+    functions = {'sum': 'fsum("{0}")', 'int_sum': 'SUM("{0}"::BIGINT)', 'nunique': 'COUNT(DISTINCT "{0}")'}
+    selects = [
+        f'{functions[aggregation_function(df[column], how)].format(column)} AS "{column}"'
+        for column, how in aggregations.items()
+    ]
     
-    channels = ['MMD', 'DI', 'EMD', 'OBD-FB', 'OBD-NF']
-    top_buyers = {}
+    query = (
+        f"SELECT {', '.join(quoted + selects)} FROM frame "
+        f"WHERE {' AND '.join(f'{key} IS NOT NULL' for key in quoted)} "
+        f"GROUP BY {', '.join(quoted)} ORDER BY {', '.join(quoted)}"
+    )
+    with duckdb.connect() as con:
+        con.register('frame', df)
+        result = con.execute(query).df()
+    
+    for column, how in aggregations.items():
+        if aggregation_function(df[column], how) == 'sum':
+            result[column] = result[column].fillna(0).astype(df[column].dtype)
+        else:
+            result[column] = result[column].fillna(0).astype('int64')
+    for key in keys:
+        result[key] = result[key].astype(df[key].dtype)
+    
+    return result
+
+QUERY_BACKENDS = {
+    'pandas': aggregate_frame_pandas,
+    'duckdb': aggregate_frame_duckdb,
+}
+
+@timed()
+def aggregate_frame(df, keys, aggregations, backend=None):
+    """Group ``df`` by ``keys`` and apply ``aggregations`` ({column: 'sum' or 'nunique'}).
+
+    Returns the flat frame groupby(keys, observed=True).agg(...).reset_index()
+    gives, computed by ``backend`` (default SA_QUERY_BACKEND). Integer and
+    bool sums are int64 whatever the column width or backend, so every
+    backend returns the same dtypes. The duckdb backend falls back to pandas
+    when duckdb is not installed.
+    """
+    backend = backend or QUERY_BACKEND
+    if backend not in QUERY_BACKENDS:
+        raise ValueError(f"Unknown query backend {backend!r}; expected one of {sorted(QUERY_BACKENDS)}")
+    if backend == 'duckdb' and duckdb is None:
+        backend = 'pandas'
+    
+    result = QUERY_BACKENDS[backend](df, keys, aggregations)
+    for column, how in aggregations.items():
+        if aggregation_function(df[column], how) == 'int_sum':
+            result[column] = result[column].astype('int64')
     
-    for channel in channels:
-        channel_data = df_year[df_year['Type'] == channel]
-        buyers = channel_data.groupby('customer').agg({
-            'revenue_clean': 'sum',
-            'qty_clean': 'sum'
-        }).reset_index()
-        buyers = buyers.sort_values('revenue_clean', ascending=False).head(top_n)
-        top_buyers[channel] = buyers
+    return result
+
+@timed()
+def get_top_n_by_channel(df, key, top_n=5, value='revenue_clean', channels=None, ascending=False):
+    """Top N rows of ``key`` per channel by ``value``, from a single grouped pass
+    
+    Sums revenue/qty once over ['Type', key] and takes a partial nlargest per
+    channel instead of sorting every channel's full ranking. Returns a dict of
+    channel -> flat frame (key columns, revenue_clean, qty_clean) ordered by
+    ``value``; ``ascending=True`` gives horizontal-bar order (largest last).
+    Channels in ``channels`` with no rows map to an empty frame.
+    """
+    keys = [key] if isinstance(key, str) else list(key)
+    totals = df.groupby(['Type'] + keys, observed=True)[['revenue_clean', 'qty_clean']].sum()
+    
+    top_index = totals[value].groupby(level='Type', observed=True, group_keys=False).nlargest(top_n).index
+    top = totals.loc[top_index]
+    
+    ranked = {}
+    for channel, frame in top.groupby(level='Type', observed=True):
+        frame = frame.droplevel('Type').reset_index()
+        if ascending:
+            frame = frame.iloc[::-1].reset_index(drop=True)
+        ranked[str(channel)] = frame
+    
+    if channels is None:
+        return ranked
+    empty = totals.iloc[:0].droplevel('Type').reset_index()
+    return {channel: ranked[channel] if channel in ranked else empty.copy() for channel in channels}
+
+@timed()
+def get_top_buyers_by_channel(df, year=2025, top_n=5, partitions=None):
+    """Get top N buyers for each channel"""
+    channels = ['MMD', 'DI', 'EMD', 'OBD-FB', 'OBD-NF']
+    df_year = select_year(df, year, partitions)
     
-    return top_buyers
+    return get_top_n_by_channel(df_year, 'customer', top_n, channels=channels)
 
-def get_category_performance(df, year=2025):
+@timed()
+def get_category_performance(df, year=2025, partitions=None):
     """Get category-wise performance metrics"""
-    df_year = df[df['year'] == year]
+    df_year = select_year(df, year, partitions)
     
-    category_stats = df_year.groupby('category').agg({
+    category_stats = aggregate_frame(df_year, ['category'], {
         'revenue_clean': 'sum',
         'qty_clean': 'sum',
         'sku': 'nunique'
-    }).reset_index()
+    })
     
     category_stats.columns = ['category', 'revenue', 'quantity', 'sku_count']
     category_stats = category_stats.sort_values('revenue', ascending=False)
     
     return category_stats
 
+@timed()
 def get_category_yoy_growth(df):
     """Get detailed YoY growth by category"""
     categories = ['Food Storage', 'Smart Seal', 'Cookware']
     
+    df_years = df[df['year'].isin([2024, 2025]) & df['category'].isin(categories)]
+    totals = aggregate_frame(df_years, ['year', 'category'], {
+        'revenue_clean': 'sum',
+        'qty_clean': 'sum'
+    }).set_index(['year', 'category']).astype({'qty_clean': 'int64'})
+    items_2025 = aggregate_frame(df_years[df_years['year'] == 2025], ['category', 'item_display'], {
+        'revenue_clean': 'sum',
+        'qty_clean': 'sum'
+    })
+    
+    def total(year, category, column):
+        key = (year, category)
+        return totals.at[key, column] if key in totals.index else 0
+    
     growth_data = []
     
     for category in categories:
-        cat_2024 = df[(df['year'] == 2024) & (df['category'] == category)]
-        cat_2025 = df[(df['year'] == 2025) & (df['category'] == category)]
-        
-        revenue_2024 = cat_2024['revenue_clean'].sum()
-        revenue_2025 = cat_2025['revenue_clean'].sum()
+        revenue_2024 = total(2024, category, 'revenue_clean')
+        revenue_2025 = total(2025, category, 'revenue_clean')
         
-        qty_2024 = cat_2024['qty_clean'].sum()
-        qty_2025 = cat_2025['qty_clean'].sum()
+        qty_2024 = total(2024, category, 'qty_clean')
+        qty_2025 = total(2025, category, 'qty_clean')
         
         revenue_growth = ((revenue_2025 - revenue_2024) / revenue_2024 * 100) if revenue_2024 > 0 else 0
         qty_growth = ((qty_2025 - qty_2024) / qty_2024 * 100) if qty_2024 > 0 else 0
         
         # Get top items
-        top_items_2025 = cat_2025.groupby('item_display').agg({
-            'revenue_clean': 'sum',
-            'qty_clean': 'sum'
-        }).reset_index().sort_values('revenue_clean', ascending=False).head(5)
+        top_items_2025 = items_2025[items_2025['category'] == category].drop(columns='category')
+        top_items_2025 = top_items_2025.reset_index(drop=True).sort_values('revenue_clean', ascending=False).head(5)
         
         growth_data.append({
             'category': category,
@@ -201,15 +1189,156 @@ def get_category_yoy_growth(df):
     
     return growth_data
 
-def get_channel_category_breakdown(df, year=2025):
+@timed()
+def get_channel_category_breakdown(df, year=2025, partitions=None):
     """Get revenue breakdown by channel and category"""
-    df_year = df[df['year'] == year]
+    df_year = select_year(df, year, partitions)
     
-    breakdown = df_year.groupby(['Type', 'category']).agg({
+    breakdown = aggregate_frame(df_year, ['Type', 'category'], {
         'revenue_clean': 'sum',
         'qty_clean': 'sum'
-    }).reset_index()
+    })
     
     breakdown = breakdown.sort_values(['Type', 'revenue_clean'], ascending=[True, False])
     
     return breakdown
+
+def get_sku_codes(skus, dim):
+    """SKU dimension code per row of a categorical sku column (-1 when not in the master)"""
+    category_codes = dim['sku'].get_indexer(skus.cat.categories.str.strip())
+    # Missing SKUs (category code -1) pick up the trailing -1
+    return np.append(category_codes, -1)[skus.cat.codes.to_numpy()]
+
+@timed()
+def get_sku_metrics(df, dim):
+    """Per-row margin and shipping volume, looked up from the SKU dimension by array take.
+
+    gross_margin and landed_margin are revenue less qty times FOB_Cost and
+    LandedCost; costed_revenue is the revenue of rows whose FOB_Cost is known,
+    the base for margin percentages. Unknown costs give NaN, which sums skip.
+    """
+    codes = get_sku_codes(df['sku'], dim)
+    qty = df['qty_clean'].to_numpy(dtype='float64')
+    revenue = df['revenue_clean'].to_numpy()
+    fob_cost = dim['FOB_Cost'][codes]
+    
+    return pd.DataFrame({
+        'costed_revenue': np.where(np.isnan(fob_cost), np.nan, revenue),
+        'gross_margin': revenue - qty * fob_cost,
+        'landed_margin': revenue - qty * dim['LandedCost'][codes],
+        'cbm_shipped': qty * dim['CBM_per_Unit'][codes],
+    }, index=df.index)
+
+@timed()
+def get_margin_breakdown(df, dim, keys, year=None, partitions=None):
+    """Revenue, margins and CBM shipped per ``keys`` (e.g. ['Type'], ['Type', 'customer'], ['category'])"""
+    df_year = df if year is None else select_year(df, year, partitions)
+    
+    frame = pd.concat([df_year[keys + ['revenue_clean']], get_sku_metrics(df_year, dim)], axis=1)
+    breakdown = aggregate_frame(frame, keys, {
+        'revenue_clean': 'sum',
+        'costed_revenue': 'sum',
+        'gross_margin': 'sum',
+        'landed_margin': 'sum',
+        'cbm_shipped': 'sum'
+    })
+    
+    breakdown['gross_margin_pct'] = breakdown['gross_margin'] / breakdown['costed_revenue'].replace(0, np.nan) * 100
+    
+    return breakdown
+
+# POE report lines: "62337 (description)" opens a product, "Total ..." / "TOTAL" close one
+POE_PRODUCT_HEADER = re.compile(r'^(\S+)\s+\((.*)\)\s*$')
+POE_COLUMNS = ['section', 'sku', 'description', 'num', 'name', 'qty', 'amount']
+
+def iter_poe_rows(lines):
+    """Stream tidy (section, sku, description, num, name, qty, amount) tuples from POE report lines.
+
+    The QuickBooks export nests detail lines under a section row ("Inventory")
+    and a product header row ("62337 (desc)"); total lines are skipped. Qty
+    and amount stay text for parse_accounting.
+    """
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if header is None:
+        return
+    position = {name: i for i, name in enumerate(header)}
+    num_at, name_at, qty_at, amount_at = (position[name] for name in ['Num', 'Name', 'Qty', 'Amount'])
+    
+    section = sku = description = None
+    for row in reader:
+        if not row:
+            continue
+        row = row + [''] * (len(header) - len(row))
+        num = row[num_at].strip()
+        
+        if num == 'TOTAL' or num.startswith('Total '):
+            continue
+        
+        if not (row[name_at] or row[qty_at] or row[amount_at]):
+            product = POE_PRODUCT_HEADER.match(num)
+            if product:
+                sku, description = product.group(1), product.group(2).strip()
+            else:
+                section, sku, description = num, None, None
+            continue
+        
+        yield section, sku, description, num, row[name_at], row[qty_at], row[amount_at]
+
+@timed()
+def parse_poe(path):
+    """Parse a POE report CSV into a typed tidy frame, reading it line by line"""
+    with open(path, newline='', encoding='utf-8') as f:
+        poe = pd.DataFrame.from_records(iter_poe_rows(f), columns=POE_COLUMNS)
+    
+    poe['qty'] = parse_accounting(poe['qty'], 'qty').astype('int64')
+    poe['amount'] = parse_accounting(poe['amount'], 'amount')
+    
+    return poe.astype({'section': 'category', 'sku': 'category', 'description': 'category', 'name': 'category'})
+
+@timed()
+def load_poe(data_dir=DATA_DIR, cache_dir=CACHE_DIR, use_cache=True):
+    """The parsed POE table, cached as Feather under the file's content hash"""
+    path = os.path.join(data_dir, INPUT_SCHEMAS['poe']['file'])
+    if not use_cache or feather is None:
+        return parse_poe(path)
+    
+    version = get_data_version({'poe.csv': {'sha256': hash_file(path).hexdigest()}})
+    cache_path = os.path.join(cache_dir, f'poe-{version}.feather')
+    try:
+        return read_feather_mapped(cache_path)
+    except (OSError, ValueError):
+        pass
+    
+    poe = parse_poe(path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        write_feather_atomic(poe, cache_path)
+        remove_stale_cache_files(cache_dir, ['poe'], version)
+    except OSError:
+        pass
+    return poe
+
+@timed()
+def get_sku_positions(df, poe, year=2025, partitions=None):
+    """Sales velocity per SKU for ``year`` next to its POE quantity and amount.
+
+    monthly_qty averages over the months of ``year`` that have sales;
+    months_of_cover is POE qty over monthly_qty. SKUs on only one side are
+    kept with zeros on the other.
+    """
+    df_year = select_year(df, year, partitions)
+    months = max(df_year['month'].nunique(), 1)
+    
+    sales = aggregate_frame(df_year, ['sku'], {'qty_clean': 'sum', 'revenue_clean': 'sum'})
+    sales['sku'] = sales['sku'].astype(str)
+    positions = aggregate_frame(poe, ['sku'], {'qty': 'sum', 'amount': 'sum'})
+    positions['sku'] = positions['sku'].astype(str)
+    positions.columns = ['sku', 'poe_qty', 'poe_amount']
+    
+    merged = sales.merge(positions, on='sku', how='outer').fillna(0)
+    merged = merged.astype({'qty_clean': 'int64', 'poe_qty': 'int64'})
+    merged['monthly_qty'] = merged['qty_clean'] / months
+    merged['months_of_cover'] = merged['poe_qty'] / merged['monthly_qty'].replace(0, np.nan)
+    
+    return merged.sort_values('poe_qty', ascending=False).reset_index(drop=True)
@@ -0,0 +1,208 @@
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+# JSON-lines file every finished stage is appended to; unset disables the log
+TIMING_LOG = os.environ.get('SA_TIMING_LOG')
+
+try:
+    PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):  # No sysconf outside POSIX
+    PAGE_SIZE = 4096
+
+_local = threading.local()
+_log_lock = threading.Lock()
+
+# Guards collectors shared with worker threads and the worker counters below (see bind_timing)
+_records_lock = threading.Lock()
+_stage_ids = itertools.count(1)
+_active_workers = 0
+_worker_starts = 0
+
+def current_rss():
+    """Resident set size of this process in bytes, or None where /proc is unavailable"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+def timing_enabled():
+    """True when a collector is active on this thread or the JSON log is on"""
+    return TIMING_LOG is not None or getattr(_local, 'records', None) is not None
+
+def write_timing_log(record, path=None):
+    """Append one stage record to the JSON-lines timing log"""
+    path = path or TIMING_LOG
+    line = json.dumps(record, default=str)
+    with _log_lock:
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+
+@contextmanager
+def timed_stage(stage, rows=None):
+    """Time a block as one stage: wall time, rows processed and RSS delta.
+
+    Yields the stage record so the block can fill in ``rows`` once it
+    knows them. Each record carries its own ``id``, the ``parent`` id of the
+    enclosing stage (across bind_timing) and the ``thread`` it ran on. RSS is
+    process-wide, so the memory delta is None for any stage that overlapped
+    a bind_timing worker. A no-op unless timing is enabled (see timing_enabled).
+    """
+    if not timing_enabled():
+        yield {}
+        return
+
+    global _active_workers, _worker_starts
+    depth = getattr(_local, 'depth', 0)
+    parent = getattr(_local, 'parent', None)
+    records = getattr(_local, 'records', None)
+    with _records_lock:
+        record = {
+            'id': next(_stage_ids), 'parent': parent, 'thread': threading.current_thread().name,
+            'stage': stage, 'depth': depth, 'rows': rows,
+        }
+        concurrent = _active_workers > 0
+        worker_starts = _worker_starts
+        # Listed on entry so nested stages follow their parent
+        if records is not None:
+            records.append(record)
+    rss_before = current_rss()
+    started = time.perf_counter()
+    _local.depth, _local.parent = depth + 1, record['id']
+    try:
+        yield record
+    finally:
+        _local.depth, _local.parent = depth, parent
+        record['seconds'] = time.perf_counter() - started
+        rss_after = current_rss()
+        with _records_lock:
+            concurrent = concurrent or _active_workers > 0 or _worker_starts != worker_starts
+        if rss_before is not None and rss_after is not None and not concurrent:
+            record['memory_delta_mb'] = (rss_after - rss_before) / 1e6
+        else:
+            record['memory_delta_mb'] = None
+
+        if TIMING_LOG is not None:
+            record['time'] = time.time()
+            try:
+                write_timing_log(record)
+            except OSError:
+                pass
+
+def count_rows(value):
+    """Row count of a frame/series, or of the first frame in a tuple/list"""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return len(value)
+    if isinstance(value, (tuple, list)):
+        for item in value:
+            if isinstance(item, (pd.DataFrame, pd.Series)):
+                return len(item)
+    return None
+
+def timed_iter(stage, items):
+    """Yield from ``items``, timing each pull as one ``stage``.
+
+    For lazy iterators that do their work in next(), such as a chunked CSV
+    reader, whose parse cost a stage around creating the iterator misses.
+    """
+    items = iter(items)
+    while True:
+        with timed_stage(stage) as record:
+            try:
+                item = next(items)
+            except StopIteration:
+                record['rows'] = 0
+                return
+            record['rows'] = count_rows(item)
+        yield item
+
+def timed(stage=None):
+    """Decorator form of timed_stage, named after the function by default.
+
+    Rows are taken from the first frame argument, or from the result when
+    the function takes none (e.g. loaders).
+    """
+    def decorator(func):
+        name = stage or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not timing_enabled():
+                return func(*args, **kwargs)
+
+            with timed_stage(name, count_rows(args)) as record:
+                result = func(*args, **kwargs)
+                if record.get('rows') is None:
+                    record['rows'] = count_rows(result)
+                return result
+        return wrapper
+    return decorator
+
+def bind_timing(func):
+    """Wrap ``func`` to record into this thread's collector, under the current stage, wherever it runs.
+
+    For callables handed to a worker thread, e.g. pool.submit(bind_timing(f)),
+    whose stages would otherwise miss the caller's collector and parent.
+    """
+    if not timing_enabled():
+        return func
+    context = getattr(_local, 'records', None), getattr(_local, 'depth', 0), getattr(_local, 'parent', None)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        global _active_workers, _worker_starts
+        saved = getattr(_local, 'records', None), getattr(_local, 'depth', 0), getattr(_local, 'parent', None)
+        with _records_lock:
+            _active_workers += 1
+            _worker_starts += 1
+        _local.records, _local.depth, _local.parent = context
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _local.records, _local.depth, _local.parent = saved
+            with _records_lock:
+                _active_workers -= 1
+    return wrapper
+
+def start_timing_collection():
+    """Collect this thread's stage records from now on; returns the (live) list"""
+    _local.records = []
+    _local.depth = 0
+    _local.parent = None
+    return _local.records
+
+def stop_timing_collection():
+    """Stop collecting on this thread and return what was collected"""
+    records = getattr(_local, 'records', None) or []
+    _local.records = None
+    return records
+
+def timings_frame(records):
+    """Stage records as a frame for display, each stage indented under its parent.
+
+    Stages from worker threads are listed under the stage that submitted
+    them rather than in the order they happened to start.
+    """
+    with _records_lock:
+        records = list(records)
+    ids = {record['id'] for record in records}
+    children = {}
+    for record in records:
+        parent = record['parent'] if record['parent'] in ids else None
+        children.setdefault(parent, []).append(record)
+
+    rows = []
+    pending = [(record, 0) for record in reversed(children.get(None, []))]
+    while pending:
+        record, depth = pending.pop()
+        rows.append({**record, 'stage': '  ' * depth + record['stage']})
+        pending.extend((child, depth + 1) for child in reversed(children.get(record['id'], [])))
+
+    return pd.DataFrame(rows, columns=['stage', 'thread', 'seconds', 'rows', 'memory_delta_mb'])
@@ -0,0 +1,168 @@
+import logging
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import data_loader
+
+DATA_DIR = os.path.join(REPO_DIR, data_loader.DATA_DIR)
+
+def classify_obd(row):
+    """The original row-wise OBD split that classify_channels replaced"""
+    if row['Type'] == 'OBD':
+        customer_lower = str(row['customer']).lower()
+        if 'french bull' in customer_lower or 'fb' in customer_lower:
+            return 'OBD-FB'
+        elif 'neoflam' in customer_lower or 'nf' in customer_lower:
+            return 'OBD-NF'
+        else:
+            return 'OBD-Other'
+    return row['Type']
+
+def test_classify_channels_matches_row_wise_labels():
+    buyers = data_loader.read_input('buyer', DATA_DIR)
+    df = pd.DataFrame({'customer': buyers['Customer'], 'Type': buyers['Type'].fillna('Other')})
+    # A customer without a name, both inside and outside OBD
+    df = pd.concat([df, pd.DataFrame({'customer': [np.nan, np.nan], 'Type': ['OBD', 'EMD']})], ignore_index=True)
+    assert (df['Type'] == 'OBD').sum() > 1 and (df['Type'] != 'OBD').any()
+    
+    expected = df.apply(classify_obd, axis=1)
+    labels = data_loader.classify_channels(df['Type'], df['customer'])
+    
+    pd.testing.assert_series_equal(labels, expected, check_names=False)
+
+def test_add_date_attributes_leaves_missing_dates_out_of_every_year():
+    df = pd.DataFrame({'date': pd.to_datetime(['2024-12-31', None, '2025-03-01'])})
+    df = data_loader.add_date_attributes(df, ['date_key', 'year', 'month', 'quarter'])
+    
+    assert df['year'].tolist() == [2024, 0, 2025]
+    assert df['month'].tolist() == [12, 0, 3]
+    assert df['quarter'].tolist() == [4, 0, 1]
+    assert df['date_key'].tolist() == [20241231, 0, 20250301]
+    assert df['year'].dtype == np.int16
+
+def write_sales(path, rows, mode='w'):
+    """Write sales_total.csv rows for the test item master SKU"""
+    sku = data_loader.build_sku_whitelist(DATA_DIR)[0]
+    sales = pd.DataFrame({
+        'date': [date for date, _ in rows],
+        'customer': 'Amazon', 'sku': sku, 'item': 'Item', 'category': 'Tableware',
+        'brand': '', 'shape': '', 'size_capacity': '', 'qty': '1', 'price': '$1.00',
+        'revenue': [revenue for _, revenue in rows],
+    })
+    sales.to_csv(path, index=False, header=mode == 'w', mode=mode)
+
+def test_build_sales_frame_drops_rows_without_a_date(tmp_path, caplog):
+    for name in ('db_buyer.csv', 'item_master.csv'):
+        shutil.copy(os.path.join(DATA_DIR, name), tmp_path)
+    write_sales(tmp_path / 'sales_total.csv', [('11/23/2024', '$1.00'), ('', '$1.00'), ('02/01/2025', '$1.00')])
+    
+    with caplog.at_level(logging.WARNING, logger='data_loader'):
+        df = data_loader.build_sales_frame(str(tmp_path))
+    
+    assert df['year'].tolist() == [2024, 2025]
+    assert df['date'].notna().all()
+    assert '1 rows without a date were dropped' in caplog.text
+
+@pytest.mark.skipif(data_loader.duckdb is None, reason='duckdb is not installed')
+def test_duckdb_backend_matches_pandas_on_overflowing_sums():
+    df = pd.DataFrame({
+        'Type': pd.Categorical(['MMD', 'MMD', 'MMD', 'DI']),
+        'year': np.array([2025, 2025, 2025, 2024], dtype='int16'),
+        'qty_clean': np.array([2_000_000_000] * 3 + [7], dtype='int32'),
+        'revenue_clean': [0.1, 0.2, 0.3, 1.5],
+        'customer': pd.Categorical(['A', 'B', 'A', 'C']),
+    })
+    aggregations = {'qty_clean': 'sum', 'revenue_clean': 'sum', 'customer': 'nunique'}
+    
+    expected = data_loader.aggregate_frame(df, ['year', 'Type'], aggregations, backend='pandas')
+    result = data_loader.aggregate_frame(df, ['year', 'Type'], aggregations, backend='duckdb')
+    
+    assert result['qty_clean'].tolist() == [7, 6_000_000_000]
+    pd.testing.assert_frame_equal(result, expected)
+
+@pytest.mark.skipif(data_loader.feather is None, reason='pyarrow is not installed')
+def test_incremental_append_waits_for_a_row_being_written(tmp_path, monkeypatch):
+    for name in ('db_buyer.csv', 'item_master.csv'):
+        shutil.copy(os.path.join(DATA_DIR, name), tmp_path)
+    sales_path = tmp_path / 'sales_total.csv'
+    cache_dir = str(tmp_path / '.cache')
+    write_sales(sales_path, [('11/23/2024', '$1.00')])
+    data_loader.load_dataset(str(tmp_path), cache_dir)
+    
+    # One complete row, then a row caught mid-write that the writer finishes while the loader waits
+    write_sales(sales_path, [('02/01/2025', '$2.00')], mode='a')
+    with open(sales_path, 'ab') as f:
+        f.write(b'03/01/2025,Amazon,1,Item,Tableware,,,,1,$1.00,"$1,2')
+    
+    def finish_row(seconds):
+        with open(sales_path, 'ab') as f:
+            f.write(b'34.50"\n')
+    monkeypatch.setattr(data_loader.time, 'sleep', finish_row)
+    
+    df, _ = data_loader.load_dataset(str(tmp_path), cache_dir)
+    assert df['revenue_clean'].tolist() == [1.0, 2.0, 1234.5]
+
+@pytest.mark.skipif(data_loader.feather is None, reason='pyarrow is not installed')
+def test_incremental_append_loads_a_last_row_without_line_break(tmp_path, monkeypatch):
+    for name in ('db_buyer.csv', 'item_master.csv'):
+        shutil.copy(os.path.join(DATA_DIR, name), tmp_path)
+    sales_path = tmp_path / 'sales_total.csv'
+    cache_dir = str(tmp_path / '.cache')
+    write_sales(sales_path, [('11/23/2024', '$1.00')])
+    data_loader.load_dataset(str(tmp_path), cache_dir)
+    
+    # The export ends without a line break and is never written again
+    with open(sales_path, 'ab') as f:
+        f.write(b'02/01/2025,Amazon,1,Item,Tableware,,,,1,$1.00,$2.00')
+    monkeypatch.setattr(data_loader, 'APPEND_SETTLE_SECONDS', 0.01)
+    monkeypatch.setattr(data_loader.file_settled, '__defaults__', (0.01,))
+    
+    cached, _ = data_loader.load_dataset(str(tmp_path), cache_dir)
+    uncached, _ = data_loader.load_dataset(str(tmp_path), cache_dir, use_cache=False)
+    assert cached['revenue_clean'].tolist() == [1.0, 2.0]
+    pd.testing.assert_frame_equal(cached, uncached, check_categorical=False)
+
+@pytest.mark.skipif(data_loader.duckdb is None, reason='duckdb is not installed')
+def test_duckdb_backend_matches_pandas_dtypes():
+    df = pd.DataFrame({
+        'Type': pd.Categorical(['MMD', 'DI', 'MMD', 'EMD']),
+        'category': pd.Categorical(['Tableware', 'Canister', 'Canister', 'Tableware']),
+        'qty_clean': np.array([3, 4, 5, 6], dtype='int32'),
+        'revenue_clean': [0.5, 1.25, 2.0, 4.0],
+        'price_clean': np.array([1.5, 2.5, 3.5, 4.5], dtype='float32'),
+        'customer': pd.Categorical(['A', 'B', 'A', 'C']),
+    })
+    aggregations = {'qty_clean': 'sum', 'revenue_clean': 'sum', 'price_clean': 'sum', 'customer': 'nunique'}
+    
+    expected = data_loader.aggregate_frame(df, ['Type', 'category'], aggregations, backend='pandas')
+    result = data_loader.aggregate_frame(df, ['Type', 'category'], aggregations, backend='duckdb')
+    
+    assert expected['qty_clean'].dtype == np.int64
+    pd.testing.assert_frame_equal(result, expected, check_dtype=True)
+
+@pytest.mark.skipif(data_loader.feather is None, reason='pyarrow is not installed')
+def test_date_dimension_is_cached_and_merged_on_append(tmp_path):
+    for name in ('db_buyer.csv', 'item_master.csv'):
+        shutil.copy(os.path.join(DATA_DIR, name), tmp_path)
+    sales_path = tmp_path / 'sales_total.csv'
+    cache_dir = str(tmp_path / '.cache')
+    write_sales(sales_path, [('11/23/2024', '$1.00'), ('02/01/2025', '$2.00')])
+    data_loader.load_dataset(str(tmp_path), cache_dir)
+    
+    _, aggregates = data_loader.load_dataset(str(tmp_path), cache_dir)
+    assert aggregates['date_dim'].index.tolist() == [20241123, 20250201]
+    assert aggregates['date_dim']['iso_week'].tolist() == [47, 5]
+    
+    write_sales(sales_path, [('02/01/2025', '$3.00'), ('12/31/2025', '$4.00')], mode='a')
+    df, aggregates = data_loader.load_dataset(str(tmp_path), cache_dir)
+    expected = data_loader.build_date_aggregate(df)
+    pd.testing.assert_frame_equal(aggregates['date_dim'], expected)
+    assert set(df['date_key']) == set(aggregates['date_dim'].index)